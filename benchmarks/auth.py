@@ -0,0 +1,59 @@
+"""
+per-request cost of access token verification, full signature check
+against verified tokens cache, reads .env like the app, run from
+repository root:
+
+    python benchmarks/auth.py --tokens 1000 --repeat 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from security.jwt import (  # noqa: E402
+    get_jwt_payload,
+    get_signed_jwt,
+    jwt_keyring,
+    verified_token_cache
+)
+
+
+def measure(verify, tokens: list[str], repeat: int) -> float:
+    """mean microseconds per verification"""
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for token in tokens:
+            verify(token)
+    elapsed = time.perf_counter() - started_at
+    return round(elapsed / (repeat * len(tokens)) * 1_000_000, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tokens', type=int, default=1000,
+                        help='distinct tokens, one per user')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='requests per token')
+    args = parser.parse_args()
+
+    tokens = [get_signed_jwt(user_id=user_id)
+              for user_id in range(args.tokens)]
+    verified_token_cache.clear()
+
+    results = {
+        'signature_check_us': measure(jwt_keyring.verify, tokens, args.repeat),
+        'cached_us': measure(get_jwt_payload, tokens, args.repeat),
+        'cache_hit_ratio': round(verified_token_cache.hit_ratio, 4),
+    }
+    results['speedup'] = round(
+        results['signature_check_us'] / results['cached_us'], 1
+    )
+    print(json.dumps({'tokens': args.tokens, 'repeat': args.repeat,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+compares two load.py reports, e.g. of base and feature branch:
+
+    python benchmarks/compare.py base.json new.json --threshold 0.1
+
+exits with code 1 when p95 latency or errors of any scenario regressed
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+
+def relative_change(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    if not base or new is None:
+        return None
+    return (new - base) / base
+
+
+def format_change(change: Optional[float]) -> str:
+    return '-' if change is None else f'{change:+.1%}'
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    """prints table of changes, returns regressed scenarios"""
+    regressions = []
+    print(f'{"scenario":<14}{"rps":>10}{"p50":>10}{"p95":>10}{"p99":>10}'
+          f'{"errors":>12}')
+    for name, new_scenario in new['scenarios'].items():
+        base_scenario = base['scenarios'].get(name)
+        if base_scenario is None:
+            print(f'{name:<14} new scenario')
+            continue
+
+        base_latency = base_scenario['latency_ms']
+        new_latency = new_scenario['latency_ms']
+        p95_change = relative_change(base_latency['p95'], new_latency['p95'])
+        print(
+            f'{name:<14}'
+            f'{format_change(relative_change(base_scenario["throughput"], new_scenario["throughput"])):>10}'
+            f'{format_change(relative_change(base_latency["p50"], new_latency["p50"])):>10}'
+            f'{format_change(p95_change):>10}'
+            f'{format_change(relative_change(base_latency["p99"], new_latency["p99"])):>10}'
+            f'{base_scenario["errors"]:>6} ->{new_scenario["errors"]:>4}'
+        )
+        if (
+            p95_change is not None and p95_change > threshold
+            or new_scenario['errors'] > base_scenario['errors']
+        ):
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='compare load.py reports')
+    parser.add_argument('base', type=Path)
+    parser.add_argument('new', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative p95 latency growth')
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    new = json.loads(args.new.read_text())
+    print(f'{base.get("commit")} -> {new.get("commit")}')
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f'regressed: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
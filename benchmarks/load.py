@@ -0,0 +1,351 @@
+"""
+load benchmark of library-API hot paths
+
+boots the app with uvicorn (or uses already running one with --base-url),
+seeds books, readers and loans through the API, then drives every scenario
+with concurrent clients and prints JSON report, run from repository root:
+
+    python benchmarks/load.py --books 1000 --readers 300 --output run.json
+
+database is taken from .env the same way as for the app, run migrations
+before, seeded rows are prefixed with run id so runs don`t collide
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+import httpx
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+PASSWORD = 'benchmark-password'
+SEED_BATCH_SIZE = 10_000
+
+
+@dataclass
+class ScenarioResult:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    # connection errors and timeouts
+    failures: int = 0
+    elapsed: float = 0
+
+    def record(self, started_at: float, status_code: int) -> None:
+        self.latencies.append(time.perf_counter() - started_at)
+        self.statuses[status_code] += 1
+
+    def report(self) -> dict:
+        latencies = sorted(self.latencies)
+        requests = len(latencies) + self.failures
+        return {
+            'requests': requests,
+            'throughput': round(requests / self.elapsed, 2)
+            if self.elapsed else 0,
+            # 5xx and transport errors, 4xx are business rejections
+            'errors': self.failures + sum(
+                count for status_code, count in self.statuses.items()
+                if status_code >= 500
+            ),
+            'rejected': sum(
+                count for status_code, count in self.statuses.items()
+                if 400 <= status_code < 500
+            ),
+            'statuses': {
+                str(status_code): count
+                for status_code, count in sorted(self.statuses.items())
+            },
+            'latency_ms': {
+                'mean': to_ms(sum(latencies) / len(latencies))
+                if latencies else None,
+                'p50': to_ms(percentile(latencies, 50)),
+                'p95': to_ms(percentile(latencies, 95)),
+                'p99': to_ms(percentile(latencies, 99)),
+                'max': to_ms(latencies[-1]) if latencies else None,
+            },
+        }
+
+
+def percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def to_ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=SRC_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                await client.get('/metrics')
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'app at {base_url} is not responding')
+                await asyncio.sleep(0.2)
+
+
+def start_app(port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app',
+         '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning'],
+        cwd=SRC_DIR
+    )
+
+
+async def login(client: httpx.AsyncClient, email: str) -> None:
+    response = await client.post(
+        '/auth/login/', json={'email': email, 'password': PASSWORD}
+    )
+    response.raise_for_status()
+
+
+async def bulk_create(
+        client: httpx.AsyncClient, url: str, rows: list[dict]
+) -> list[int]:
+    ids = []
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        response = await client.post(
+            url, json=rows[start:start + SEED_BATCH_SIZE],
+            params={'on_conflict': 'skip'}
+        )
+        response.raise_for_status()
+        ids.extend(item['id'] for item in response.json())
+    return ids
+
+
+async def seed(
+        client: httpx.AsyncClient, args: argparse.Namespace, run_id: str
+) -> tuple[list[int], list[int]]:
+    """creates books and readers, and loans for part of readers,
+    returns ids of books and of readers without loans"""
+    rng = random.Random(args.seed)
+    book_ids = await bulk_create(client, '/books/bulk', [
+        {
+            'title': f'Benchmark book {i}',
+            'autor': f'Autor {i % 100}',
+            'publish_year': rng.randint(1900, 2025),
+            'isbn': f'bench-{run_id}-{i}',
+            'instances': args.instances,
+            'description': 'seeded by benchmarks/load.py',
+        }
+        for i in range(args.books)
+    ])
+    reader_ids = await bulk_create(client, '/readers/bulk', [
+        {'name': f'Reader {i}', 'email': f'reader-{run_id}-{i}@example.com'}
+        for i in range(args.readers)
+    ])
+
+    # readers with loans keep them, the rest is used by borrow scenario
+    loaned_readers = reader_ids[:args.loans]
+    for reader_id in loaned_readers:
+        book_id = rng.choice(book_ids)
+        await client.post(f'/borrowed-book/borrow/{book_id}/{reader_id}')
+
+    return book_ids, reader_ids[args.loans:]
+
+
+async def run_scenario(
+        name: str,
+        args: argparse.Namespace,
+        worker: Callable[[int, ScenarioResult, float], Awaitable[None]],
+) -> ScenarioResult:
+    """runs worker coroutine in args.concurrency copies for args.duration"""
+    result = ScenarioResult()
+    deadline = time.perf_counter() + args.duration
+    started_at = time.perf_counter()
+    await asyncio.gather(*(
+        worker(worker_id, result, deadline)
+        for worker_id in range(args.concurrency)
+    ))
+    result.elapsed = time.perf_counter() - started_at
+    print(f'{name}: {len(result.latencies)} requests', file=sys.stderr)
+    return result
+
+
+async def timed(
+        result: ScenarioResult,
+        request: Awaitable[httpx.Response]
+) -> Optional[httpx.Response]:
+    started_at = time.perf_counter()
+    try:
+        response = await request
+    except httpx.TransportError:
+        result.failures += 1
+        return None
+    result.record(started_at, response.status_code)
+    return response
+
+
+async def benchmark(args: argparse.Namespace, base_url: str) -> dict:
+    run_id = uuid4().hex[:8]
+    email = f'bench-{run_id}@example.com'
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        response = await client.post(
+            '/auth/register/', json={'email': email, 'password': PASSWORD}
+        )
+        response.raise_for_status()
+        await login(client, email)
+
+        print(f'seeding run {run_id}', file=sys.stderr)
+        book_ids, free_reader_ids = await seed(client, args, run_id)
+        rng = random.Random(args.seed)
+
+        async def login_worker(worker_id, result, deadline):
+            # own client, login response replaces cookies
+            async with httpx.AsyncClient(
+                base_url=base_url, timeout=args.timeout
+            ) as login_client:
+                while time.perf_counter() < deadline:
+                    await timed(result, login_client.post(
+                        '/auth/login/',
+                        json={'email': email, 'password': PASSWORD}
+                    ))
+
+        async def books_page_worker(worker_id, result, deadline):
+            while time.perf_counter() < deadline:
+                await timed(result, client.get(
+                    '/books/', params={'limit': args.page_size}
+                ))
+
+        async def book_worker(worker_id, result, deadline):
+            while time.perf_counter() < deadline:
+                book_id = rng.choice(book_ids)
+                await timed(result, client.get(f'/books/{book_id}'))
+
+        borrow_result = ScenarioResult()
+
+        async def borrow_return_worker(worker_id, return_result, deadline):
+            # every worker owns its readers, so loans limit is only hit
+            # when there are less free readers than workers
+            readers = free_reader_ids[worker_id::args.concurrency]
+            if not readers:
+                return
+            turn = 0
+            while time.perf_counter() < deadline:
+                reader_id = readers[turn % len(readers)]
+                book_id = rng.choice(book_ids)
+                turn += 1
+                response = await timed(borrow_result, client.post(
+                    f'/borrowed-book/borrow/{book_id}/{reader_id}'
+                ))
+                if response is None or response.status_code != 200:
+                    continue
+                await timed(return_result, client.post(
+                    f'/borrowed-book/return/{book_id}/{reader_id}'
+                ))
+
+        scenarios = {
+            'login': login_worker,
+            'books_page': books_page_worker,
+            'book': book_worker,
+        }
+        results = {
+            name: (await run_scenario(name, args, worker)).report()
+            for name, worker in scenarios.items()
+        }
+        return_result = await run_scenario(
+            'borrow_return', args, borrow_return_worker
+        )
+        borrow_result.elapsed = return_result.elapsed
+        results['borrow'] = borrow_result.report()
+        results['return'] = return_result.report()
+
+    return {
+        'run_id': run_id,
+        'commit': get_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'params': {
+            name: value for name, value in vars(args).items()
+            if name not in ('output', 'base_url')
+        },
+        'scenarios': results,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--base-url',
+                        help='benchmark already running app, '
+                             'by default app is started with uvicorn')
+    parser.add_argument('--app-workers', type=int, default=1)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--instances', type=int, default=5,
+                        help='instances of every seeded book')
+    parser.add_argument('--readers', type=int, default=300)
+    parser.add_argument('--loans', type=int, default=100,
+                        help='readers given a loan before benchmark')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=15,
+                        help='seconds per scenario')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path,
+                        help='also write report to this file')
+    args = parser.parse_args()
+    if args.loans > args.readers:
+        parser.error('--loans can`t be greater than --readers')
+    return args
+
+
+async def main() -> None:
+    args = parse_args()
+    app_process = None
+    base_url = args.base_url
+    if base_url is None:
+        port = get_free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        app_process = start_app(port, args.app_workers)
+    try:
+        await wait_until_ready(base_url)
+        report = await benchmark(args, base_url)
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait()
+
+    report_json = json.dumps(report, indent=2)
+    print(report_json)
+    if args.output is not None:
+        args.output.write_text(report_json)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+compares list endpoints serialization paths on in-memory rows,
+no database needed, run from repository root:
+
+    python benchmarks/serialization.py --rows 10000
+
+schemas - what list endpoints do by default: model_validate of every ORM
+          object, then fastapi validates and encodes response model again
+rows    - API_FAST_SERIALIZATION path: plain rows serialized once by
+          core.serialization.dump_json (orjson when installed)
+rows (pydantic-core) - the same without orjson
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import core.serialization  # noqa: E402
+from api.responses import RawJSONResponse  # noqa: E402
+from core.serialization import (  # noqa: E402
+    build_rows_adapter, dump_json, get_schema_columns
+)
+from schemas.book import BookOutputSchema  # noqa: E402
+
+
+BOOKS_ROWS_ADAPTER = build_rows_adapter(list[BookOutputSchema])
+
+
+def make_rows(count: int) -> list[dict]:
+    return [
+        {
+            'title': f'Book {i}',
+            'autor': f'Autor {i % 100}',
+            'publish_year': 1900 + i % 125,
+            'isbn': f'978-{i:09d}',
+            'instances': i % 5,
+            'description': 'Lorem ipsum dolor sit amet ' * 4,
+            'id': i + 1,
+            'version': 1,
+        }
+        for i in range(count)
+    ]
+
+
+def make_app(rows: list[dict]) -> FastAPI:
+    # orm objects stand-in, read through from_attributes like real ones
+    orm_objects = [SimpleNamespace(**row) for row in rows]
+    app = FastAPI()
+
+    @app.get('/schemas')
+    async def get_schemas() -> list[BookOutputSchema]:
+        return [BookOutputSchema.model_validate(book) for book in orm_objects]
+
+    @app.get('/rows')
+    async def get_rows() -> list[BookOutputSchema]:
+        return RawJSONResponse(
+            dump_json([dict(row) for row in rows], BOOKS_ROWS_ADAPTER)
+        )
+
+    return app
+
+
+async def measure(
+        client: httpx.AsyncClient, url: str, repeat: int
+) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - started_at)
+        response.raise_for_status()
+    timings.sort()
+    return {
+        'min_ms': round(timings[0] * 1000, 3),
+        'median_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'bytes': len(response.content),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # rows are selected in schema fields order
+    assert list(rows[0]) == get_schema_columns(BookOutputSchema)
+    app = make_app(rows)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://benchmark'
+    ) as client:
+        schemas_response = await client.get('/schemas')
+        rows_response = await client.get('/rows')
+        assert schemas_response.json() == rows_response.json()
+
+        results = {'schemas': await measure(client, '/schemas', args.repeat)}
+        if core.serialization.orjson is not None:
+            results['rows'] = await measure(client, '/rows', args.repeat)
+        orjson = core.serialization.orjson
+        core.serialization.orjson = None
+        try:
+            results['rows (pydantic-core)'] = await measure(
+                client, '/rows', args.repeat
+            )
+        finally:
+            core.serialization.orjson = orjson
+
+    baseline = results['schemas']['median_ms']
+    for result in results.values():
+        result['speedup'] = round(baseline / result['median_ms'], 1)
+    print(json.dumps(
+        {'rows': args.rows, 'date': date.today().isoformat(),
+         'results': results},
+        indent=2
+    ))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
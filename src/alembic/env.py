@@ -12,6 +12,7 @@ from models.user import User # noqa
 from models.book import Book # noqa
 from models.borrowed_book import BorrowedBook # noqa
 from models.reader import Reader # noqa
+from models.outbox import OutboxMessage # noqa
 
 
 # this is the Alembic Config object, which provides
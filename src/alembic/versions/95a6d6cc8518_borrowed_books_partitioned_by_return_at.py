@@ -0,0 +1,226 @@
+"""borrowed books partitioned by return_at
+
+Revision ID: 95a6d6cc8518
+Revises: 367ac289de5b
+Create Date: 2026-10-18 19:26:51.240417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "95a6d6cc8518"
+down_revision: Union[str, None] = "367ac289de5b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    "ix_borrowed_books_reader_id_book_id",
+    "ix_borrowed_books_book_id",
+    "ix_borrowed_books_reader_id_not_returned",
+    "ux_borrowed_books_reader_id_book_id_not_returned",
+    "ix_borrowed_books_borrow_at",
+)
+# partitions created ahead of current month, later ones are created by
+# maintenance.partitions
+MONTHS_AHEAD = 3
+
+
+def create_borrowed_books_table(*constraints, **kwargs) -> None:
+    op.create_table(
+        "borrowed_books",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('borrowed_books_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("reader_id", sa.Integer(), nullable=False),
+        sa.Column("borrow_at", sa.Date(), nullable=False),
+        sa.Column("return_at", sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["book_id"],
+            ["books.id"],
+            name="borrowed_books_book_id_fkey",
+            ondelete="RESTRICT",
+        ),
+        sa.ForeignKeyConstraint(
+            ["reader_id"],
+            ["readers.id"],
+            name="borrowed_books_reader_id_fkey",
+            ondelete="RESTRICT",
+        ),
+        *constraints,
+        **kwargs,
+    )
+
+
+def move_borrowed_books(from_table: str) -> None:
+    """copies loans into new borrowed_books table, hands id sequence over
+    to it and drops from_table"""
+    op.execute(
+        "INSERT INTO borrowed_books "
+        "(id, book_id, reader_id, borrow_at, return_at) "
+        "SELECT id, book_id, reader_id, borrow_at, return_at "
+        f"FROM {from_table}"
+    )
+    # sequence is dropped with the table owning it
+    op.execute(
+        "ALTER SEQUENCE borrowed_books_id_seq OWNED BY borrowed_books.id"
+    )
+    op.drop_table(from_table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # index names are free for the new table only after old ones are
+    # dropped, loans are copied before indexes are built anyway
+    op.rename_table("borrowed_books", "borrowed_books_unpartitioned")
+    op.execute(
+        "ALTER INDEX borrowed_books_pkey "
+        "RENAME TO borrowed_books_unpartitioned_pkey"
+    )
+    for index_name in INDEXES:
+        op.drop_index(index_name, table_name="borrowed_books_unpartitioned")
+
+    # primary key can`t contain nullable return_at, so every partition
+    # gets its own on id
+    create_borrowed_books_table(postgresql_partition_by="RANGE (return_at)")
+    # not returned loans have NULL return_at, which only default
+    # partition takes, it also keeps loans returned out of monthly
+    # partitions range
+    op.execute(
+        "CREATE TABLE borrowed_books_open "
+        "PARTITION OF borrowed_books DEFAULT"
+    )
+    op.execute("ALTER TABLE borrowed_books_open ADD PRIMARY KEY (id)")
+    # monthly partitions from the oldest return up to MONTHS_AHEAD or
+    # the latest return, whichever is later
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            partition_name text;
+            partition_start date := date_trunc('month', least(
+                (SELECT min(return_at) FROM borrowed_books_unpartitioned),
+                current_date
+            ));
+            last_start date := greatest(
+                date_trunc('month', current_date)
+                    + interval '{MONTHS_AHEAD} months',
+                date_trunc('month', (
+                    SELECT max(return_at) FROM borrowed_books_unpartitioned
+                ))
+            );
+        BEGIN
+            WHILE partition_start <= last_start LOOP
+                partition_name := 'borrowed_books_p'
+                    || to_char(partition_start, 'YYYY_MM');
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF borrowed_books '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition_name,
+                    partition_start,
+                    (partition_start + interval '1 month')::date
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ADD PRIMARY KEY (id)', partition_name
+                );
+                partition_start := partition_start + interval '1 month';
+            END LOOP;
+        END $$
+        """
+    )
+    move_borrowed_books("borrowed_books_unpartitioned")
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_index(
+        "ix_borrowed_books_reader_id_book_id",
+        "borrowed_books",
+        ["reader_id", "book_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_borrowed_books_book_id",
+        "borrowed_books",
+        ["book_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_borrowed_books_reader_id_not_returned",
+        "borrowed_books",
+        ["reader_id"],
+        unique=False,
+        postgresql_where=sa.text("return_at IS NULL"),
+    )
+    op.create_index(
+        "ux_borrowed_books_reader_id_book_id_not_returned",
+        "borrowed_books",
+        ["reader_id", "book_id", "return_at"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        postgresql_where=sa.text("return_at IS NULL"),
+    )
+    op.create_index(
+        "ix_borrowed_books_borrow_at",
+        "borrowed_books",
+        ["borrow_at"],
+        unique=False,
+        postgresql_include=["book_id", "reader_id", "return_at"],
+    )
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # loans of partitions already detached by maintenance.partitions
+    # archive are not brought back
+    op.rename_table("borrowed_books", "borrowed_books_partitioned")
+    for index_name in INDEXES:
+        op.drop_index(index_name, table_name="borrowed_books_partitioned")
+
+    create_borrowed_books_table(
+        sa.PrimaryKeyConstraint("id", name="borrowed_books_pkey"),
+    )
+    # dropping partitioned table drops its partitions
+    move_borrowed_books("borrowed_books_partitioned")
+
+    op.create_index(
+        "ix_borrowed_books_reader_id_book_id",
+        "borrowed_books",
+        ["reader_id", "book_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_borrowed_books_book_id",
+        "borrowed_books",
+        ["book_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_borrowed_books_reader_id_not_returned",
+        "borrowed_books",
+        ["reader_id"],
+        unique=False,
+        postgresql_where=sa.text("return_at IS NULL"),
+    )
+    op.create_index(
+        "ux_borrowed_books_reader_id_book_id_not_returned",
+        "borrowed_books",
+        ["reader_id", "book_id"],
+        unique=True,
+        postgresql_where=sa.text("return_at IS NULL"),
+    )
+    op.create_index(
+        "ix_borrowed_books_borrow_at",
+        "borrowed_books",
+        ["borrow_at"],
+        unique=False,
+        postgresql_include=["book_id", "reader_id", "return_at"],
+    )
@@ -3,9 +3,7 @@ from fastapi import (
     status, Response
 )
 
-from core.database import async_engine
-from repositories.auth import AuthRepository
-from services.auth import AuthService
+from dependencies import AuthServiceDep
 from exceptions.services import (
     UserDoesNotExist,
     UserPasswordVerificationFailedError
@@ -17,19 +15,24 @@ from schemas.auth import (
 
 
 auth_router = APIRouter(prefix='/auth', tags=['auth-user'])
-auth_repository = AuthRepository(engine=async_engine)
-auth_service = AuthService(repository=auth_repository)
 
 
 @auth_router.post('/register/')
-async def register(new_user: UserRegisterationSchema) -> int:
+async def register(
+    new_user: UserRegisterationSchema,
+    auth_service: AuthServiceDep
+) -> int:
     new_user_id = await auth_service.register(new_user=new_user)
 
     return new_user_id
 
 
 @auth_router.post('/login/')
-async def login(response: Response, user_credentials: UserLoginSchema) -> str:
+async def login(
+    response: Response,
+    user_credentials: UserLoginSchema,
+    auth_service: AuthServiceDep
+) -> str:
     try:
         user_access_token = await auth_service.login(
             user_credentials=user_credentials)
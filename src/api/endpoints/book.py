@@ -1,35 +1,120 @@
-from typing import Annotated
+from typing import Annotated, Optional, Union
 
-from fastapi import APIRouter, Depends, Path, HTTPException, status
+from fastapi import (
+    APIRouter, Depends, Path, Query, Body,
+    HTTPException, Request, Response, status
+)
 
-from core.database import async_engine
-from repositories.book import BookRepository
-from services.book import BookService
-from dependencies import get_current_user
-from exceptions.services import BookDoesNotExist, BookISBNAlreadyExists
+from dependencies import get_current_user, BookServiceDep
+from api.etag import make_etag, is_not_modified, not_modified_response
+from api.responses import RawJSONResponse
+from core.serialization import build_rows_adapter, dump_json
+from core.settings import api_settings
+from exceptions.services import (
+    BookDoesNotExist,
+    BookISBNAlreadyExists,
+    BookHasBorrowedBooks,
+    InvalidPaginationCursor
+)
 from schemas.book import (
     BookOutputSchema,
+    BookPageSchema,
+    BookSummarySchema,
+    BookSummaryPageSchema,
+    BookSearchPageSchema,
     BookCreateSchema,
     BookUpdateSchema
 )
+from schemas.view import ListView
+from schemas.bulk import BulkConflictStrategy, BulkItemResultSchema
+
 
+# fast serialization path rows, adapters are built once per view
+BOOK_PAGE_ROWS_ADAPTERS = {
+    ListView.full: build_rows_adapter(BookPageSchema),
+    ListView.summary: build_rows_adapter(BookSummaryPageSchema)
+}
 
 book_router = APIRouter(prefix='/books', tags=['book'], 
                         dependencies=[Depends(get_current_user)])
-book_repository = BookRepository(async_engine)
-book_service = BookService(book_repository)
 
 
 @book_router.get('/')
-async def get_all() -> list[BookOutputSchema]:
-    books = await book_service.get_all()
+async def get_page(
+    request: Request,
+    response: Response,
+    book_service: BookServiceDep,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    after: Annotated[Optional[str], Query()] = None,
+    autor: Annotated[Optional[str], Query()] = None,
+    publish_year: Annotated[Optional[int], Query(ge=1)] = None,
+    available: Annotated[Optional[bool], Query()] = None,
+    view: Annotated[ListView, Query()] = ListView.full
+) -> Union[BookPageSchema, BookSummaryPageSchema]:
+    page_kwargs = dict(
+        limit=limit,
+        after=after,
+        autor=autor,
+        publish_year=publish_year,
+        available=available
+    )
+    try:
+        if api_settings.fast_serialization:
+            books_page = await book_service.get_page_rows(
+                **page_kwargs,
+                schema=(BookSummarySchema if view is ListView.summary
+                        else BookOutputSchema)
+            )
+            versions = [(book['id'], book['version'])
+                        for book in books_page['items']]
+            next_cursor = books_page['next_cursor']
+        else:
+            if view is ListView.summary:
+                books_page = await book_service.get_summary_page(**page_kwargs)
+            else:
+                books_page = await book_service.get_page(**page_kwargs)
+            versions = [(book.id, book.version) for book in books_page.items]
+            next_cursor = books_page.next_cursor
+    except InvalidPaginationCursor:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail='Invalid pagination cursor'
+        )
+
+    etag = make_etag('books', view.value, versions, next_cursor)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    if api_settings.fast_serialization:
+        return RawJSONResponse(
+            dump_json(books_page, BOOK_PAGE_ROWS_ADAPTERS[view]),
+            headers={'ETag': etag}
+        )
+    response.headers['ETag'] = etag
+
+    return books_page
+
 
-    return books  
+@book_router.get('/search')
+async def search(
+    book_service: BookServiceDep,
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0, le=10_000)] = 0
+) -> BookSearchPageSchema:
+    results_page = await book_service.search(
+        query_text=q, limit=limit, offset=offset
+    )
+
+    return results_page
 
 
 @book_router.get('/{book_id}')
 async def get_one_by_id(
-    book_id: Annotated[int, Path()]
+    book_id: Annotated[int, Path()],
+    request: Request,
+    response: Response,
+    book_service: BookServiceDep
 ) -> BookOutputSchema:
     try:
         book = await book_service.get_one_by_id(book_id=book_id)
@@ -38,11 +123,20 @@ async def get_one_by_id(
             status.HTTP_404_NOT_FOUND,
             detail='Book not found'
         )
+
+    etag = make_etag('book', book.id, book.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers['ETag'] = etag
+
     return book
 
 
 @book_router.post('/create/')
-async def create_one(new_book: BookCreateSchema) -> int:
+async def create_one(
+    new_book: BookCreateSchema,
+    book_service: BookServiceDep
+) -> int:
     try:
         new_book_id = await book_service.create_one(new_book=new_book)
     except BookISBNAlreadyExists:
@@ -54,10 +148,29 @@ async def create_one(new_book: BookCreateSchema) -> int:
     return new_book_id
 
 
+@book_router.post('/bulk')
+async def bulk_upsert(
+    books: Annotated[
+        list[BookCreateSchema], Body(min_length=1, max_length=100_000)
+    ],
+    book_service: BookServiceDep,
+    on_conflict: Annotated[BulkConflictStrategy, Query()] = (
+        BulkConflictStrategy.update
+    )
+) -> list[BulkItemResultSchema]:
+    results = await book_service.bulk_upsert(
+        books=books,
+        update_existing=on_conflict is BulkConflictStrategy.update
+    )
+
+    return results
+
+
 @book_router.patch('/update/{book_id}')
 async def update_one(
     book_id: Annotated[int, Path()], 
-    book_on_update: BookUpdateSchema
+    book_on_update: BookUpdateSchema,
+    book_service: BookServiceDep
 ) -> None:
     try: 
         await book_service.update_one(book_id=book_id,
@@ -70,7 +183,10 @@ async def update_one(
 
 
 @book_router.delete('/delete/{book_id}')
-async def delete_one(book_id: Annotated[int, Path]) -> None:
+async def delete_one(
+    book_id: Annotated[int, Path()],
+    book_service: BookServiceDep
+) -> None:
     try: 
         await book_service.delete_one(book_id=book_id)
     except BookDoesNotExist:
@@ -78,4 +194,9 @@ async def delete_one(book_id: Annotated[int, Path]) -> None:
             status.HTTP_404_NOT_FOUND,
             detail='Book not found'
         )
+    except BookHasBorrowedBooks:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail='Book has been borrowed'
+        )
     
\ No newline at end of file
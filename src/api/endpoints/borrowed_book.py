@@ -1,33 +1,44 @@
-from typing import Annotated
+from typing import Annotated, Union
 
-from fastapi import APIRouter, Path, HTTPException, Depends, status
+from fastapi import APIRouter, Path, Query, HTTPException, Depends, status
 
-from core.database import async_engine
-from dependencies import get_current_user
-from repositories.borrowed_book import BorrowedBookRepository
-from services.borrowed_book import BorrowedBookService
+from dependencies import get_current_user, BorrowedBookServiceDep
+from api.responses import RawJSONResponse
+from core.serialization import build_rows_adapter, dump_json
+from core.settings import api_settings
 from exceptions.services import (
     BorrowedBookCountPerReaderError,
     BorrowedBookUnableToBorrowBook,
     BorrowedBookDoesNotExist,
     BorrowedBookAlreadyBorrowed,
-    BorrowedBookAlreadyReturned
+    BorrowedBookAlreadyReturned,
+    BookDoesNotExist,
+    ReaderDoesNotExist
 )
-from schemas.borrowed_book import BorrowedBookOutputSchema
-from api.endpoints.book import book_service
+from schemas.borrowed_book import (
+    BorrowedBookOutputSchema,
+    BorrowedBookSummarySchema,
+    BorrowedBookBatchSchema,
+    BorrowedBookBatchItemSchema,
+)
+from schemas.view import ListView
+
 
+# fast serialization path rows, adapters are built once per view
+BORROWED_BOOKS_ROWS_ADAPTERS = {
+    ListView.full: build_rows_adapter(list[BorrowedBookOutputSchema]),
+    ListView.summary: build_rows_adapter(list[BorrowedBookSummarySchema]),
+}
 
 borrowed_book_router = APIRouter(prefix="/borrowed-book", tags=["borrowed-book"],
                                  dependencies=[Depends(get_current_user)])
-borrowed_book_repository = BorrowedBookRepository(async_engine)
-borrowed_book_service = BorrowedBookService(
-    repository=borrowed_book_repository, book_service=book_service
-)
 
 
 @borrowed_book_router.post("/borrow/{book_id}/{reader_id}")
 async def borrow_one(
-    book_id: Annotated[int, Path()], reader_id: Annotated[int, Path()]
+    book_id: Annotated[int, Path()],
+    reader_id: Annotated[int, Path()],
+    borrowed_book_service: BorrowedBookServiceDep,
 ) -> int:
     try:
         new_borrowed_book_id = await borrowed_book_service.create_one(
@@ -47,12 +58,24 @@ async def borrow_one(
             status.HTTP_409_CONFLICT,
             detail="Reader have already borrowed this book"
         )
+    except BookDoesNotExist:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Book not found"
+        )
+    except ReaderDoesNotExist:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Reader not found"
+        )
     return new_borrowed_book_id
 
 
 @borrowed_book_router.post("/return/{book_id}/{reader_id}")
 async def return_one(
-    book_id: Annotated[int, Path()], reader_id: Annotated[int, Path()]
+    book_id: Annotated[int, Path()],
+    reader_id: Annotated[int, Path()],
+    borrowed_book_service: BorrowedBookServiceDep,
 ) -> None:
     try:
         await borrowed_book_service.return_one(
@@ -70,14 +93,77 @@ async def return_one(
         )
     
 
+@borrowed_book_router.post("/borrow-batch")
+async def borrow_many(
+    borrowed_books: BorrowedBookBatchSchema,
+    borrowed_book_service: BorrowedBookServiceDep,
+) -> list[BorrowedBookBatchItemSchema]:
+    try:
+        results = await borrowed_book_service.create_many(
+            reader_id=borrowed_books.reader_id, book_ids=borrowed_books.book_ids
+        )
+    except ReaderDoesNotExist:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Reader not found"
+        )
+    except BorrowedBookAlreadyBorrowed:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail="Reader have already borrowed this book"
+        )
+    return results
+
+
+@borrowed_book_router.post("/return-batch")
+async def return_many(
+    borrowed_books: BorrowedBookBatchSchema,
+    borrowed_book_service: BorrowedBookServiceDep,
+) -> list[BorrowedBookBatchItemSchema]:
+    try:
+        results = await borrowed_book_service.return_many(
+            reader_id=borrowed_books.reader_id, book_ids=borrowed_books.book_ids
+        )
+    except ReaderDoesNotExist:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Reader not found"
+        )
+    return results
+
+
 @borrowed_book_router.get('/{reader_id}')
 async def get_all_not_returned(
-    reader_id: Annotated[int, Path()]
-) -> list[BorrowedBookOutputSchema]:
-    not_returned_borrow_books = (
-        await borrowed_book_service.get_all_not_returned_by_reader_id(
-            reader_id=reader_id
+    reader_id: Annotated[int, Path()],
+    borrowed_book_service: BorrowedBookServiceDep,
+    view: Annotated[ListView, Query()] = ListView.full,
+) -> Union[list[BorrowedBookOutputSchema], list[BorrowedBookSummarySchema]]:
+    if api_settings.fast_serialization:
+        not_returned_borrow_books = (
+            await borrowed_book_service.get_all_not_returned_rows_by_reader_id(
+                reader_id=reader_id,
+                schema=(
+                    BorrowedBookSummarySchema
+                    if view is ListView.summary
+                    else BorrowedBookOutputSchema
+                ),
+            )
+        )
+        return RawJSONResponse(
+            dump_json(not_returned_borrow_books, BORROWED_BOOKS_ROWS_ADAPTERS[view])
+        )
+
+    if view is ListView.summary:
+        not_returned_borrow_books = await (
+            borrowed_book_service.get_all_not_returned_summary_by_reader_id(
+                reader_id=reader_id
+            )
+        )
+    else:
+        not_returned_borrow_books = (
+            await borrowed_book_service.get_all_not_returned_by_reader_id(
+                reader_id=reader_id
+            )
         )
-    )
 
     return not_returned_borrow_books
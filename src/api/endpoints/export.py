@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+
+from core.database import async_engine
+from dependencies import get_current_user
+from repositories.export import ExportRepository
+from services.export import ExportService
+from schemas.export import ExportEntity, ExportFormat
+
+
+export_router = APIRouter(prefix='/export', tags=['export'],
+                          dependencies=[Depends(get_current_user)])
+export_repository = ExportRepository(async_engine)
+export_service = ExportService(export_repository)
+
+
+@export_router.get('/{entity}')
+async def export_all(
+    entity: Annotated[ExportEntity, Path()],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = (
+        ExportFormat.ndjson
+    )
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_service.export(entity=entity, export_format=export_format),
+        media_type=export_service.get_media_type(export_format),
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{entity.value}.{export_format.value}"'
+            )
+        }
+    )
@@ -1,34 +1,81 @@
-from typing import Annotated
+from typing import Annotated, Union
 
-from fastapi import APIRouter, Path, HTTPException, Depends, status
+from fastapi import (
+    APIRouter, Path, Query, Body, HTTPException,
+    Depends, Request, Response, status
+)
 
-from core.database import async_engine
-from dependencies import get_current_user
-from repositories.reader import ReaderRepository
-from services.reader import ReaderService
-from exceptions.services import ReaderDoesNotExist, ReaderEmailAlreadyExists
+from dependencies import get_current_user, ReaderServiceDep
+from api.etag import make_etag, is_not_modified, not_modified_response
+from api.responses import RawJSONResponse
+from core.serialization import build_rows_adapter, dump_json
+from core.settings import api_settings
+from exceptions.services import (
+    ReaderDoesNotExist,
+    ReaderEmailAlreadyExists,
+    ReaderHasBorrowedBooks
+)
 from schemas.reader import (
     ReaderOutputSchema,
     ReaderCreateSchema,
-    ReaderUpdateSchema
+    ReaderUpdateSchema,
+    ReaderSummarySchema
 )
+from schemas.view import ListView
+from schemas.bulk import BulkConflictStrategy, BulkItemResultSchema
 
 
+# fast serialization path rows, adapters are built once per view
+READERS_ROWS_ADAPTERS = {
+    ListView.full: build_rows_adapter(list[ReaderOutputSchema]),
+    ListView.summary: build_rows_adapter(list[ReaderSummarySchema])
+}
+
 reader_router = APIRouter(prefix='/readers', tags=['reader'],
                           dependencies=[Depends(get_current_user)])
-reader_repository = ReaderRepository(async_engine)
-reader_service = ReaderService(reader_repository)
 
 
 @reader_router.get('/')
-async def get_all() -> list[ReaderOutputSchema]:
-    readers = await reader_service.get_all()
+async def get_all(
+    request: Request,
+    response: Response,
+    reader_service: ReaderServiceDep,
+    view: Annotated[ListView, Query()] = ListView.full
+) -> Union[list[ReaderOutputSchema], list[ReaderSummarySchema]]:
+    if api_settings.fast_serialization:
+        readers = await reader_service.get_all_rows(
+            schema=(ReaderSummarySchema if view is ListView.summary
+                    else ReaderOutputSchema)
+        )
+        versions = [(reader['id'], reader['version']) for reader in readers]
+    else:
+        if view is ListView.summary:
+            readers = await reader_service.get_all_summary()
+        else:
+            readers = await reader_service.get_all()
+        versions = [(reader.id, reader.version) for reader in readers]
+
+    etag = make_etag('readers', view.value, versions)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    if api_settings.fast_serialization:
+        return RawJSONResponse(
+            dump_json(readers, READERS_ROWS_ADAPTERS[view]),
+            headers={'ETag': etag}
+        )
+    response.headers['ETag'] = etag
 
     return readers
 
 
 @reader_router.get('/{reader_id}')
-async def get_one_by_id(reader_id: Annotated[int, Path()]) -> ReaderOutputSchema:
+async def get_one_by_id(
+    reader_id: Annotated[int, Path()],
+    request: Request,
+    response: Response,
+    reader_service: ReaderServiceDep
+) -> ReaderOutputSchema:
     try:
         reader = await reader_service.get_one_by_id(reader_id=reader_id)
     except ReaderDoesNotExist:
@@ -37,11 +84,19 @@ async def get_one_by_id(reader_id: Annotated[int, Path()]) -> ReaderOutputSchema
             detail='Reader not found'
         )
 
+    etag = make_etag('reader', reader.id, reader.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers['ETag'] = etag
+
     return reader
 
 
 @reader_router.post('/create/')
-async def create_one(new_reader: ReaderCreateSchema) -> int:
+async def create_one(
+    new_reader: ReaderCreateSchema,
+    reader_service: ReaderServiceDep
+) -> int:
     try:
         new_reader_id = await reader_service.create_one(new_reader=new_reader)
     except ReaderEmailAlreadyExists:
@@ -52,10 +107,29 @@ async def create_one(new_reader: ReaderCreateSchema) -> int:
     return new_reader_id
 
 
+@reader_router.post('/bulk')
+async def bulk_upsert(
+    readers: Annotated[
+        list[ReaderCreateSchema], Body(min_length=1, max_length=100_000)
+    ],
+    reader_service: ReaderServiceDep,
+    on_conflict: Annotated[BulkConflictStrategy, Query()] = (
+        BulkConflictStrategy.update
+    )
+) -> list[BulkItemResultSchema]:
+    results = await reader_service.bulk_upsert(
+        readers=readers,
+        update_existing=on_conflict is BulkConflictStrategy.update
+    )
+
+    return results
+
+
 @reader_router.patch('/update/{reader_id}')
 async def update_one(
     reader_id: Annotated[int, Path()], 
-    reader_on_update: ReaderUpdateSchema
+    reader_on_update: ReaderUpdateSchema,
+    reader_service: ReaderServiceDep
 ) -> None:
     try:
         await reader_service.update_one(reader_id=reader_id, 
@@ -73,7 +147,10 @@ async def update_one(
     
 
 @reader_router.delete('/delete/{reader_id}')
-async def delete_one(reader_id: Annotated[int, Path()]) -> None:
+async def delete_one(
+    reader_id: Annotated[int, Path()],
+    reader_service: ReaderServiceDep
+) -> None:
     try:
         await reader_service.delete_one(reader_id=reader_id)
     except ReaderDoesNotExist:
@@ -81,4 +158,9 @@ async def delete_one(reader_id: Annotated[int, Path()]) -> None:
             status.HTTP_404_NOT_FOUND,
             detail='Reader not found'
         )
+    except ReaderHasBorrowedBooks:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail='Reader has borrowed books'
+        )
     
\ No newline at end of file
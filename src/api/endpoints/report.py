@@ -0,0 +1,38 @@
+from datetime import date
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+
+from dependencies import get_current_user, ReportServiceDep
+from exceptions.services import InvalidReportDateRange
+from schemas.report import CirculationGroupBy, CirculationReportSchema
+
+
+report_router = APIRouter(prefix='/reports', tags=['reports'],
+                          dependencies=[Depends(get_current_user)])
+
+
+@report_router.get('/circulation')
+async def get_circulation(
+    report_service: ReportServiceDep,
+    date_from: Annotated[date, Query()],
+    date_to: Annotated[Optional[date], Query()] = None,
+    group_by: Annotated[CirculationGroupBy, Query()] = CirculationGroupBy.month,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    offset: Annotated[int, Query(ge=0)] = 0
+) -> CirculationReportSchema:
+    try:
+        circulation = await report_service.get_circulation(
+            date_from=date_from,
+            date_to=date_to or date.today(),
+            group_by=group_by,
+            limit=limit,
+            offset=offset
+        )
+    except InvalidReportDateRange as e:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return circulation
@@ -0,0 +1,52 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+
+from dependencies import get_current_user, StatsServiceDep
+from exceptions.services import InvalidPaginationCursor
+from schemas.stats import (
+    BookAvailabilityPageSchema,
+    ReaderActiveLoansPageSchema
+)
+
+
+stats_router = APIRouter(prefix='/stats', tags=['stats'],
+                         dependencies=[Depends(get_current_user)])
+
+
+@stats_router.get('/availability')
+async def get_books_availability(
+    stats_service: StatsServiceDep,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+    after: Annotated[Optional[str], Query()] = None
+) -> BookAvailabilityPageSchema:
+    try:
+        books_availability = await stats_service.get_books_availability(
+            limit=limit, after=after
+        )
+    except InvalidPaginationCursor:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail='Invalid pagination cursor'
+        )
+
+    return books_availability
+
+
+@stats_router.get('/active-loans')
+async def get_readers_active_loans(
+    stats_service: StatsServiceDep,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+    after: Annotated[Optional[str], Query()] = None
+) -> ReaderActiveLoansPageSchema:
+    try:
+        readers_active_loans = await stats_service.get_readers_active_loans(
+            limit=limit, after=after
+        )
+    except InvalidPaginationCursor:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail='Invalid pagination cursor'
+        )
+
+    return readers_active_loans
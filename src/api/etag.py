@@ -0,0 +1,31 @@
+from hashlib import blake2b
+from typing import Any
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """strong ETag built from values identifying representation"""
+    digest = blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """checks If-None-Match header against current ETag"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    # If-None-Match uses weak comparison
+    client_etags = (client_etag.strip().removeprefix('W/')
+                    for client_etag in if_none_match.split(','))
+    return etag in client_etags
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={'ETag': etag}
+    )
@@ -0,0 +1,8 @@
+from fastapi import Response
+
+
+class RawJSONResponse(Response):
+    """already serialized json, returning it skips response model
+    validation and encoding done by fastapi"""
+
+    media_type = 'application/json'
@@ -0,0 +1,193 @@
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from core.settings import CacheSettings
+
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar('V')
+S = TypeVar('S', bound=BaseModel)
+
+
+class TTLCache(Generic[V]):
+    """in-process LRU cache with expiring entries
+
+    Not thread safe, meant to be used from the event loop thread only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """stores value for ttl seconds, never longer than cache ttl"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CacheBackend(ABC):
+    """key-value storage for serialized cache entries"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.invalidate(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """stores entries in redis, client is anything with redis.asyncio
+    get/set/delete interface, so a fake can replace it in tests
+
+    Redis errors are logged and treated as cache misses, the database
+    stays the source of truth.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = 'library:') -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning('redis cache get failed', exc_info=True)
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self.client.set(
+                self.prefix + key, value, px=int(self.ttl * 1000)
+            )
+        except Exception:
+            logger.warning('redis cache set failed', exc_info=True)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            logger.error('redis cache delete failed, entries stay '
+                         'until they expire', exc_info=True)
+
+
+class SchemaCache(Generic[S]):
+    """read-through cache of pydantic schemas stored as json"""
+
+    def __init__(
+            self, backend: CacheBackend, schema: type[S], namespace: str
+    ) -> None:
+        self.backend = backend
+        self.schema = schema
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _key(self, key: Hashable) -> str:
+        return f'{self.namespace}:{key}'
+
+    async def get(self, key: Hashable) -> Optional[S]:
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+            return None
+
+        try:
+            cached_value = self.schema.model_validate_json(value)
+        except ValidationError:
+            # stored by an older schema version
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cached_value
+
+    async def set(self, key: Hashable, value: S) -> None:
+        await self.backend.set(self._key(key), value.model_dump_json().encode())
+
+    async def invalidate(self, *keys: Hashable) -> None:
+        if keys:
+            await self.backend.delete(*(self._key(key) for key in keys))
+
+
+def build_cache_backend(settings: CacheSettings) -> CacheBackend:
+    if settings.backend == 'redis':
+        # optional dependency, needed only with redis backend
+        from redis.asyncio import Redis
+
+        return RedisCacheBackend(
+            client=Redis.from_url(settings.redis_url), ttl=settings.ttl
+        )
+
+    return InMemoryCacheBackend(maxsize=settings.maxsize, ttl=settings.ttl)
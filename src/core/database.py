@@ -1,8 +1,19 @@
-from sqlalchemy.ext.asyncio import create_async_engine
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker
+)
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import URL
 
 from core.settings import postgres_settings
+from core.metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    register_pool_metrics
+)
+from core.query_log import instrument_engine
 
 
 postgres_url = URL.create(
@@ -10,16 +21,54 @@ postgres_url = URL.create(
     host=postgres_settings.host,
     port=postgres_settings.port,
     username=postgres_settings.user,
-    password=postgres_settings.password,
+    password=postgres_settings.password.get_secret_value(),
     database=postgres_settings.db
 ).render_as_string(hide_password=False)
 
 async_engine = create_async_engine(
     postgres_url,
-    echo=True
+    echo=postgres_settings.echo,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=postgres_settings.pool_size,
+    max_overflow=postgres_settings.max_overflow,
+    pool_timeout=postgres_settings.pool_timeout,
+    pool_recycle=postgres_settings.pool_recycle,
+    pool_pre_ping=postgres_settings.pool_pre_ping,
+    connect_args={
+        'prepared_statement_cache_size': (
+            postgres_settings.prepared_statement_cache_size
+        ),
+        'server_settings': {
+            'statement_timeout': str(postgres_settings.statement_timeout)
+        }
+    }
+)
+register_pool_metrics(async_engine)
+instrument_engine(
+    async_engine,
+    slow_query_threshold=postgres_settings.slow_query_threshold / 1000
+)
+
+# one session per request, see dependencies.get_session
+async_session_maker = async_sessionmaker(
+    async_engine,
+    expire_on_commit=False
 )
 
 
+def run_after_commit(
+        session: AsyncSession, callback: Callable[[], Awaitable[None]]
+) -> None:
+    """schedules callback to run once session transaction is commited,
+    it is dropped if transaction is rolled back"""
+    session.info.setdefault('after_commit_callbacks', []).append(callback)
+
+
+async def run_after_commit_callbacks(session: AsyncSession) -> None:
+    for callback in session.info.pop('after_commit_callbacks', []):
+        await callback()
+
+
 # base model class
 class Base(DeclarativeBase):
     pass
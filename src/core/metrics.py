@@ -0,0 +1,220 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterator, TypeVar, Union
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import (
+    CounterMetricFamily, GaugeMetricFamily, Metric
+)
+from prometheus_client.registry import Collector
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.cache import TTLCache, SchemaCache
+
+if TYPE_CHECKING:
+    from security.password import PasswordHashingPool
+
+
+T = TypeVar('T')
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'Handled HTTP requests',
+    ['method', 'route', 'status']
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request handling time',
+    ['method', 'route']
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being handled',
+    ['method', 'route']
+)
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    'db_pool_checkout_duration_seconds',
+    'Time spent waiting for a pooled database connection',
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5,
+             10, 30)
+)
+PASSWORD_HASHING_WAIT_DURATION = Histogram(
+    'password_hashing_wait_seconds',
+    'Time password hashing waited for a free worker',
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+REPOSITORY_METHOD_DURATION = Histogram(
+    'repository_method_duration_seconds',
+    'Repository method execution time, queries included',
+    ['repository', 'method']
+)
+
+
+def get_route_template(scope: Scope) -> str:
+    """path template of route matching request, e.g. /books/{book_id},
+    keeps metrics labels cardinality bounded"""
+    partial_match = None
+    for route in scope['app'].routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+        if match is Match.PARTIAL and partial_match is None:
+            partial_match = route.path
+
+    return partial_match or '<unmatched>'
+
+
+class PrometheusMiddleware:
+    """counts requests and measures their latency per route"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        route = get_route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started_at = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route).observe(
+                perf_counter() - started_at
+            )
+            HTTP_REQUESTS.labels(method, route, status_code).inc()
+            in_progress.dec()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """measures how long connection checkout takes, pool wait included"""
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_DURATION.observe(perf_counter() - started_at)
+
+
+class PoolCollector(Collector):
+    """reports engine pool state at scrape time"""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        # pool is replaced on engine.dispose(), read it every time
+        pool = self.engine.pool
+        for name, documentation, value in (
+            ('db_pool_size', 'Pool size', pool.size()),
+            ('db_pool_checked_in', 'Idle pooled connections',
+             pool.checkedin()),
+            ('db_pool_checked_out', 'Connections in use',
+             pool.checkedout()),
+            # sqlalchemy counts overflow from -pool_size
+            ('db_pool_overflow', 'Connections opened over pool size',
+             max(pool.overflow(), 0)),
+        ):
+            yield GaugeMetricFamily(name, documentation, value=value)
+
+
+def register_pool_metrics(engine: AsyncEngine) -> None:
+    REGISTRY.register(PoolCollector(engine))
+
+
+class PasswordHashingPoolCollector(Collector):
+    """reports password hashing queue state at scrape time"""
+
+    def __init__(self, pool: 'PasswordHashingPool') -> None:
+        self.pool = pool
+
+    def collect(self) -> Iterator[Metric]:
+        for name, documentation, value in (
+            ('password_hashing_workers', 'Password hashing worker threads',
+             self.pool.max_workers),
+            ('password_hashing_waiting',
+             'Password hashings waiting for a free worker',
+             self.pool.waiting),
+            ('password_hashing_running', 'Password hashings in progress',
+             self.pool.running),
+        ):
+            yield GaugeMetricFamily(name, documentation, value=value)
+        yield CounterMetricFamily('password_hashing_completed',
+                                  'Finished password hashings',
+                                  value=self.pool.completed)
+
+
+def register_password_hashing_metrics(pool: 'PasswordHashingPool') -> None:
+    REGISTRY.register(PasswordHashingPoolCollector(pool))
+
+
+class CacheCollector(Collector):
+    """reports lookups counters of registered caches at scrape time"""
+
+    def __init__(self) -> None:
+        self.caches: dict[str, Union[TTLCache, SchemaCache]] = {}
+
+    def collect(self) -> Iterator[Metric]:
+        hits = CounterMetricFamily('cache_hits', 'Cache lookups found',
+                                   labels=['cache'])
+        misses = CounterMetricFamily('cache_misses', 'Cache lookups missed',
+                                     labels=['cache'])
+        hit_ratio = GaugeMetricFamily('cache_hit_ratio',
+                                      'Found share of cache lookups',
+                                      labels=['cache'])
+        for name, cache in self.caches.items():
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            hit_ratio.add_metric([name], cache.hit_ratio)
+        yield from (hits, misses, hit_ratio)
+
+
+CACHE_COLLECTOR = CacheCollector()
+REGISTRY.register(CACHE_COLLECTOR)
+
+
+def register_cache_metrics(
+        name: str, cache: Union[TTLCache, SchemaCache]
+) -> None:
+    CACHE_COLLECTOR.caches[name] = cache
+
+
+def instrument_repository(cls: type[T]) -> type[T]:
+    """class decorator timing every public async method of repository"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _timed(method, cls.__name__, name))
+
+    return cls
+
+
+def _timed(method, repository_name: str, method_name: str):
+    histogram = REPOSITORY_METHOD_DURATION.labels(repository_name, method_name)
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        started_at = perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - started_at)
+
+    return wrapper
@@ -0,0 +1,24 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from binascii import Error as Base64DecodeError
+
+from exceptions.services import InvalidPaginationCursor
+
+
+def encode_cursor(last_id: int) -> str:
+    """encodes id of the last row on a page into opaque cursor"""
+    return urlsafe_b64encode(f'id:{last_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """decodes opaque cursor back into id of the last seen row"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        decoded_cursor = urlsafe_b64decode(cursor + padding).decode()
+        prefix, last_id = decoded_cursor.split(':')
+        if prefix != 'id':
+            raise ValueError(prefix)
+        return int(last_id)
+    except (Base64DecodeError, UnicodeDecodeError, ValueError) as e:
+        raise InvalidPaginationCursor(
+            f'Cursor - {cursor} is invalid'
+        ) from e
@@ -0,0 +1,126 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.metrics import get_route_template
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestQueryStats:
+    """statements executed while handling one request"""
+
+    route: str
+    queries: int = 0
+    duration: float = 0
+    rows: int = 0
+    statements: Counter[str] = field(default_factory=Counter)
+
+
+# set by QueryLogMiddleware, sqlalchemy greenlets share context with the
+# awaiting task, so engine events see stats of the request running them
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    'request_query_stats', default=None
+)
+
+
+def _before_cursor_execute(
+        conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    conn.info.setdefault('query_started_at', []).append(perf_counter())
+
+
+def _handle_error(exception_context: ExceptionContext) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started_at'):
+        connection.info['query_started_at'].pop()
+
+
+class QueryLogger:
+    """records every statement executed by engine, logs the slow ones"""
+
+    def __init__(self, slow_query_threshold: float) -> None:
+        self.slow_query_threshold = slow_query_threshold
+
+    def __call__(
+            self, conn: Connection, cursor, statement: str, parameters,
+            context, executemany: bool
+    ) -> None:
+        duration = perf_counter() - conn.info['query_started_at'].pop()
+        # -1 when driver doesn`t know, e.g. executemany
+        rows = cursor.rowcount
+
+        stats = request_query_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.duration += duration
+            stats.rows += max(rows, 0)
+            stats.statements[statement] += 1
+
+        if duration >= self.slow_query_threshold:
+            logger.warning(
+                'slow query %.1fms, %s rows, route %s: %s',
+                duration * 1000,
+                rows,
+                stats.route if stats is not None else '-',
+                statement
+            )
+
+
+def instrument_engine(
+        engine: AsyncEngine, slow_query_threshold: float
+) -> None:
+    """attaches query logging to engine, threshold is in seconds"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute',
+                 QueryLogger(slow_query_threshold))
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+class QueryLogMiddleware:
+    """collects statements per request, flags requests issuing too many"""
+
+    def __init__(self, app: ASGIApp, max_queries_per_request: int) -> None:
+        self.app = app
+        self.max_queries_per_request = max_queries_per_request
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(route=get_route_template(scope))
+        token = request_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_query_stats.reset(token)
+            if stats.queries > self.max_queries_per_request:
+                self.log_too_many_queries(scope['method'], stats)
+
+    def log_too_many_queries(
+            self, method: str, stats: RequestQueryStats
+    ) -> None:
+        # the same statement repeated is the usual N+1 signature
+        statement, repeated = stats.statements.most_common(1)[0]
+        logger.warning(
+            'possible N+1, %s %s issued %d queries in %.1fms, '
+            'most repeated %d times: %s',
+            method,
+            stats.route,
+            stats.queries,
+            stats.duration * 1000,
+            repeated,
+            statement
+        )
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobScheduler:
+    """runs coroutine functions periodically in background tasks of the
+    app event loop, started and stopped from the app lifespan
+
+    every replica runs its own scheduler, so jobs have to be safe to run
+    concurrently, e.g. by claiming rows with SKIP LOCKED
+    """
+
+    def __init__(self) -> None:
+        self.jobs: dict[str, tuple[Callable[[], Awaitable[Any]], float]] = {}
+        self.tasks: list[asyncio.Task] = []
+
+    def add_job(
+            self, name: str, job: Callable[[], Awaitable[Any]],
+            interval: float
+    ) -> None:
+        """interval is in seconds, counted from the end of previous run"""
+        self.jobs[name] = (job, interval)
+
+    def start(self) -> None:
+        self.tasks = [
+            asyncio.create_task(self._run(name, job, interval), name=name)
+            for name, (job, interval) in self.jobs.items()
+        ]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _run(
+            self, name: str, job: Callable[[], Awaitable[Any]],
+            interval: float
+    ) -> None:
+        while True:
+            try:
+                await job()
+            except Exception:
+                # failed run is retried on the next tick
+                logger.exception('job %s failed', name)
+            await asyncio.sleep(interval)
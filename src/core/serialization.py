@@ -0,0 +1,49 @@
+from functools import cache
+from typing import Any, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+# pydantic needs it instead of typing one before python 3.12
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:
+    # optional, pydantic-core serializer is a bit slower but still one pass
+    orjson = None
+
+
+@cache
+def get_row_type(schema: type[BaseModel]) -> type:
+    """TypedDict with schema fields, rows shaped like schema are
+    serialized by its field types without building models"""
+    return TypedDict(f'{schema.__name__}Row', {
+        name: _get_row_annotation(field.annotation)
+        for name, field in schema.model_fields.items()
+    })
+
+
+def _get_row_annotation(annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return get_row_type(annotation)
+    if get_origin(annotation) is list:
+        return list[_get_row_annotation(get_args(annotation)[0])]
+    return annotation
+
+
+def build_rows_adapter(annotation: Any) -> TypeAdapter:
+    """adapter for plain rows shaped like annotation, e.g.
+    list[BookOutputSchema], build once and reuse it"""
+    return TypeAdapter(_get_row_annotation(annotation))
+
+
+def dump_json(value: Any, adapter: TypeAdapter) -> bytes:
+    """serializes plain dicts, lists and scalars, dates included,
+    without building pydantic models"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return adapter.dump_json(value)
+
+
+def get_schema_columns(schema: type[BaseModel]) -> list[str]:
+    """columns to select for rows shaped like schema"""
+    return list(schema.model_fields)
@@ -1,7 +1,10 @@
-from os import path, getenv
+from os import path, getenv, cpu_count
 from pathlib import Path
+from typing import Literal, Optional
 
 import dotenv
+from pydantic import Field, SecretStr, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 # project root dir
@@ -13,12 +16,153 @@ SECRET_KEY = getenv('SECRET_KEY')
 ALGORITHM = getenv('ALGORITHM')
 
 
-class PostgresSettings:
-    host: str = getenv('POSTGRES_HOST')
-    port: int = getenv('POSTGRES_PORT')
-    user: str = getenv('POSTGRES_USER')
-    password: str = getenv('POSTGRES_PASS')
-    db: str = getenv('POSTGRES_DB')
+class PostgresSettings(BaseSettings):
+    """postgres connection and engine settings, read from POSTGRES_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='POSTGRES_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    host: str
+    port: int = 5432
+    user: str
+    password: SecretStr = Field(validation_alias='POSTGRES_PASS')
+    db: str
+
+    # log every statement, for local debugging only
+    echo: bool = False
+    # statements slower than this (milliseconds) are logged with their
+    # route, 0 logs every statement with its duration
+    slow_query_threshold: int = Field(default=200, ge=0)
+    # requests issuing more statements are logged as possible N+1
+    max_queries_per_request: int = Field(default=10, ge=1)
+    # connection pool
+    pool_size: int = Field(default=10, ge=1)
+    max_overflow: int = Field(default=10, ge=0)
+    pool_timeout: float = Field(default=30, gt=0)
+    pool_recycle: int = Field(default=1800, ge=-1)
+    pool_pre_ping: bool = True
+    # server side limit per statement in milliseconds, 0 disables it
+    statement_timeout: int = Field(default=30_000, ge=0)
+    # asyncpg prepared statements cache per connection, 0 disables it
+    prepared_statement_cache_size: int = Field(default=100, ge=0)
 
 
 postgres_settings = PostgresSettings()
+
+
+class AuthSettings(BaseSettings):
+    """authentication settings, read from AUTH_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='AUTH_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    # authenticated users cache, entries also expire with user`s token
+    user_cache_size: int = Field(default=1024, ge=1)
+    user_cache_ttl: float = Field(default=60, ge=0)
+    # threads computing bcrypt hashes, waiting requests are queued
+    password_hashing_workers: int = Field(
+        default_factory=lambda: cpu_count() or 1, ge=1
+    )
+    # access tokens lifetime in seconds
+    token_lifetime: int = Field(default=3600, ge=1)
+    # verified tokens, entries expire with tokens
+    token_cache_size: int = Field(default=4096, ge=1)
+    # signing keys by kid, json like {"2026-10": "secret"}, tokens are signed
+    # with the active key, the others only verify tokens issued before
+    # rotation, SECRET_KEY is used if there are no keys
+    jwt_keys: dict[str, SecretStr] = Field(default_factory=dict)
+    jwt_active_kid: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_jwt_active_kid(self) -> 'AuthSettings':
+        if self.jwt_keys and self.jwt_active_kid not in self.jwt_keys:
+            raise ValueError('AUTH_JWT_ACTIVE_KID must be one of AUTH_JWT_KEYS')
+        return self
+
+
+auth_settings = AuthSettings()
+
+
+class CacheSettings(BaseSettings):
+    """books and readers cache settings, read from CACHE_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='CACHE_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    backend: Literal['memory', 'redis'] = 'memory'
+    redis_url: Optional[str] = None
+    ttl: float = Field(default=60, gt=0)
+    # entries per process, memory backend only
+    maxsize: int = Field(default=10_000, ge=1)
+
+    @model_validator(mode='after')
+    def check_redis_url(self) -> 'CacheSettings':
+        if self.backend == 'redis' and self.redis_url is None:
+            raise ValueError('CACHE_REDIS_URL is required for redis backend')
+        return self
+
+
+cache_settings = CacheSettings()
+
+
+class ApiSettings(BaseSettings):
+    """responses settings, read from API_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='API_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    # list endpoints select plain rows and serialize them once,
+    # with orjson if it is installed, instead of going through schemas
+    fast_serialization: bool = False
+
+
+api_settings = ApiSettings()
+
+
+class LibrarySettings(BaseSettings):
+    """lending rules, read from LIBRARY_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='LIBRARY_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    # days book can be kept, sets due_at of new loans
+    loan_period_days: int = Field(default=14, ge=1)
+
+
+library_settings = LibrarySettings()
+
+
+class JobsSettings(BaseSettings):
+    """background jobs started with the app, read from JOBS_* env"""
+
+    model_config = SettingsConfigDict(
+        env_prefix='JOBS_',
+        env_file=path.join(BASE_DIR, '.env'),
+        extra='ignore'
+    )
+
+    enabled: bool = True
+    # seconds between overdue loans checks
+    overdue_interval: float = Field(default=300, gt=0)
+    # loans claimed and notified per transaction
+    overdue_chunk_size: int = Field(default=500, ge=1)
+    # chunks processed at once, every one holds a connection
+    overdue_concurrency: int = Field(default=4, ge=1)
+
+
+jobs_settings = JobsSettings()
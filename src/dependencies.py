@@ -1,20 +1,131 @@
-from typing import Annotated
+from time import time
+from typing import Annotated, AsyncIterator
 
-from fastapi import HTTPException, status, Cookie
+from fastapi import Depends, HTTPException, status, Cookie
 from jose.exceptions import ExpiredSignatureError, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.endpoints.auth import auth_service
+from core.database import async_session_maker, run_after_commit_callbacks
+from core.settings import auth_settings, cache_settings, library_settings
+from core.cache import TTLCache, SchemaCache, build_cache_backend
+from core.metrics import register_cache_metrics
+from repositories.auth import AuthRepository
+from repositories.book import BookRepository
+from repositories.reader import ReaderRepository
+from repositories.borrowed_book import BorrowedBookRepository
+from repositories.stats import StatsRepository
+from services.auth import AuthService
+from services.book import BookService
+from services.reader import ReaderService
+from services.borrowed_book import BorrowedBookService
+from services.stats import StatsService
+from services.report import ReportService
 from security.jwt import get_jwt_payload
 from exceptions.services import UserDoesNotExist
+from schemas.auth import UserSchema
+from schemas.book import BookOutputSchema
+from schemas.reader import ReaderOutputSchema
 
 
-async def get_current_user(access_token: Annotated[str, Cookie()]):
+# authenticated users by id, shared between requests
+current_user_cache: TTLCache[UserSchema] = TTLCache(
+    maxsize=auth_settings.user_cache_size,
+    ttl=auth_settings.user_cache_ttl
+)
+
+# single books and readers by id
+cache_backend = build_cache_backend(cache_settings)
+book_cache = SchemaCache(cache_backend, BookOutputSchema, namespace='book')
+reader_cache = SchemaCache(cache_backend, ReaderOutputSchema, namespace='reader')
+
+register_cache_metrics('current_user', current_user_cache)
+register_cache_metrics('book', book_cache)
+register_cache_metrics('reader', reader_cache)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """unit of work: one session and one transaction per request,
+
+    shared by all repositories, commited after endpoint returns
+    and rolled back if it raises
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            yield session
+
+        # e.g. cache invalidation, skipped on rollback
+        await run_after_commit_callbacks(session)
+
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+
+def get_auth_service(session: SessionDep) -> AuthService:
+    return AuthService(
+        repository=AuthRepository(session), user_cache=current_user_cache
+    )
+
+
+def get_book_service(session: SessionDep) -> BookService:
+    return BookService(repository=BookRepository(session), cache=book_cache)
+
+
+def get_reader_service(session: SessionDep) -> ReaderService:
+    return ReaderService(
+        repository=ReaderRepository(session), cache=reader_cache
+    )
+
+
+AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
+BookServiceDep = Annotated[BookService, Depends(get_book_service)]
+ReaderServiceDep = Annotated[ReaderService, Depends(get_reader_service)]
+
+
+def get_borrowed_book_service(
+    session: SessionDep,
+    book_service: BookServiceDep,
+    reader_service: ReaderServiceDep
+) -> BorrowedBookService:
+    return BorrowedBookService(
+        repository=BorrowedBookRepository(session),
+        book_service=book_service,
+        reader_service=reader_service,
+        loan_period_days=library_settings.loan_period_days
+    )
+
+
+BorrowedBookServiceDep = Annotated[
+    BorrowedBookService, Depends(get_borrowed_book_service)
+]
+
+
+def get_stats_service(session: SessionDep) -> StatsService:
+    return StatsService(repository=StatsRepository(session))
+
+
+StatsServiceDep = Annotated[StatsService, Depends(get_stats_service)]
+
+
+def get_report_service(session: SessionDep) -> ReportService:
+    return ReportService(repository=BorrowedBookRepository(session))
+
+
+ReportServiceDep = Annotated[ReportService, Depends(get_report_service)]
+
+
+async def get_current_user(
+    access_token: Annotated[str, Cookie()],
+    auth_service: AuthServiceDep
+):
     try: 
         payload = get_jwt_payload(token=access_token)
         user_id = payload['user_id']
         if user_id is None:
             raise JWTError()
-        current_user = await auth_service.get_one_by_id(user_id=user_id)
+        # user can`t be cached for longer than his token lives
+        current_user = await auth_service.get_one_by_id(
+            user_id=user_id, cache_ttl=payload['exp'] - time()
+        )
 
     except UserDoesNotExist as e:
            raise HTTPException(
@@ -32,4 +143,4 @@ async def get_current_user(access_token: Annotated[str, Cookie()]):
             detail='invalid token'
         ) from e
     
-    return current_user
\ No newline at end of file
+    return current_user
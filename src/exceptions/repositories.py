@@ -11,3 +11,7 @@ class RowDoesNotExist(RepositoryError):
 
 class RowAlreadyExists(RepositoryError):
     pass
+
+
+class RowIsReferenced(RepositoryError):
+    pass
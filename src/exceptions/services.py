@@ -26,6 +26,10 @@ class BookISBNAlreadyExists(BookDoesNotExist):
 class BookDoesNotHaveAnyInstancesError(ServiceError):
     """raises when reader trying to borrow book with 0 instances"""
 
+
+class BookHasBorrowedBooks(ServiceError):
+    """raises when deleting book which is or was borrowed"""
+
 ### reader exceptions ###
 
 class ReaderDoesNotExist(ServiceError):
@@ -35,6 +39,10 @@ class ReaderDoesNotExist(ServiceError):
 class ReaderEmailAlreadyExists(ServiceError):
     pass
 
+
+class ReaderHasBorrowedBooks(ServiceError):
+    """raises when deleting reader who has or had borrowed books"""
+
 ### borrowed_book exceptions ###
 
 class BorrowedBookDoesNotExist(ServiceError):
@@ -59,4 +67,13 @@ class BorrowedBookUnableToBorrowBook(ServiceError):
 
 class BorrowedBookAlreadyReturned(ServiceError):
     pass
-    
\ No newline at end of file
+
+### pagination exceptions ###
+
+class InvalidPaginationCursor(ServiceError):
+    """raises when next-page cursor can`t be decoded"""
+
+### report exceptions ###
+
+class InvalidReportDateRange(ServiceError):
+    """raises when report date_from is later than date_to"""
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from repositories.borrowed_book import BorrowedBookRepository
+from repositories.outbox import OutboxRepository
+from services.notification import NotificationService
+
+
+logger = logging.getLogger(__name__)
+
+
+async def notify_overdue_loans(
+        session_maker: async_sessionmaker[AsyncSession],
+        chunk_size: int,
+        concurrency: int
+) -> int:
+    """writes outbox notification about every overdue loan not notified
+    yet, returns amount of notified loans
+
+    concurrency workers claim chunks of loans in their own transactions
+    until none is left, claimed loans are locked, so workers and other
+    replicas running the same job never notify one loan twice
+    """
+    today = date.today()
+
+    async def worker() -> int:
+        notified = 0
+        while True:
+            async with session_maker() as session:
+                async with session.begin():
+                    notification_service = NotificationService(
+                        borrowed_book_repository=BorrowedBookRepository(
+                            session
+                        ),
+                        outbox_repository=OutboxRepository(session)
+                    )
+                    claimed = await notification_service.notify_overdue(
+                        today=today, limit=chunk_size
+                    )
+            notified += claimed
+            if claimed < chunk_size:
+                return notified
+
+    notified = sum(await asyncio.gather(
+        *(worker() for _ in range(concurrency))
+    ))
+    if notified:
+        logger.info('notified %s overdue loans', notified)
+
+    return notified
@@ -1,17 +1,61 @@
+from contextlib import asynccontextmanager
+from functools import partial
+
 from fastapi import FastAPI
 
 from api.endpoints.auth import auth_router
 from api.endpoints.book import book_router
 from api.endpoints.reader import reader_router
 from api.endpoints.borrowed_book import borrowed_book_router
+from api.endpoints.export import export_router
+from api.endpoints.stats import stats_router
+from api.endpoints.report import report_router
+from api.endpoints.metrics import metrics_router
+from core.metrics import PrometheusMiddleware
+from core.query_log import QueryLogMiddleware
+from core.database import async_session_maker
+from core.scheduler import JobScheduler
+from core.settings import postgres_settings, jobs_settings
+from jobs.overdue import notify_overdue_loans
+from security.password import password_hashing_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler = JobScheduler()
+    if jobs_settings.enabled:
+        scheduler.add_job(
+            'notify_overdue_loans',
+            partial(
+                notify_overdue_loans,
+                session_maker=async_session_maker,
+                chunk_size=jobs_settings.overdue_chunk_size,
+                concurrency=jobs_settings.overdue_concurrency
+            ),
+            interval=jobs_settings.overdue_interval
+        )
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    password_hashing_pool.shutdown()
 
 
 app = FastAPI(
     title='Library-API',
-    description='API for library'
+    description='API for library',
+    lifespan=lifespan
+)
+app.add_middleware(
+    QueryLogMiddleware,
+    max_queries_per_request=postgres_settings.max_queries_per_request
 )
+app.add_middleware(PrometheusMiddleware)
 
+app.include_router(metrics_router)
 app.include_router(auth_router)
 app.include_router(book_router)
 app.include_router(reader_router)
 app.include_router(borrowed_book_router)
+app.include_router(export_router)
+app.include_router(stats_router)
+app.include_router(report_router)
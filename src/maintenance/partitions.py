@@ -0,0 +1,197 @@
+"""
+borrowed_books partitions maintenance, run from src dir, e.g. by cron
+once a month:
+
+    python -m maintenance.partitions create --months-ahead 3
+    python -m maintenance.partitions archive --older-than-months 24
+
+create  - creates monthly partitions of returned loans up to months
+          ahead of current one, loans returned in those months and
+          already put into default partition are moved into them
+archive - detaches partitions ended before cutoff into archive schema
+          (or drops them with --drop), they only have returned loans,
+          not returned ones stay in default partition
+"""
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from core.database import async_engine
+
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'borrowed_books'
+DEFAULT_PARTITION = f'{TABLE}_open'
+ARCHIVE_SCHEMA = 'archive'
+PARTITION_NAME_PATTERN = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def add_months(month: date, amount: int) -> date:
+    """first day of month amount months after month"""
+    month_index = month.year * 12 + month.month - 1 + amount
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_partition_name(month: date) -> str:
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def parse_partition_month(partition_name: str) -> Optional[date]:
+    """month of partition named by get_partition_name, None for others"""
+    match = PARTITION_NAME_PATTERN.match(partition_name)
+    if match is None:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+async def get_partitions(connection: AsyncConnection) -> list[str]:
+    result = await connection.execute(
+        text(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = :table ORDER BY child.relname'
+        ),
+        {'table': TABLE}
+    )
+    return list(result.scalars())
+
+
+async def create_partition(connection: AsyncConnection, month: date) -> None:
+    """creates partition detached, moves its loans out of default
+    partition and attaches it, plain CREATE ... PARTITION OF fails once
+    default partition has rows of that month, partitioned table has no
+    primary key, so partition gets its own"""
+    partition_name = get_partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    await connection.execute(text(
+        f'CREATE TABLE {partition_name} '
+        f'(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    ))
+    await connection.execute(text(
+        f'ALTER TABLE {partition_name} ADD PRIMARY KEY (id)'
+    ))
+    await connection.execute(
+        text(
+            'WITH moved AS ('
+            f'DELETE FROM {DEFAULT_PARTITION} '
+            'WHERE return_at >= :start AND return_at < :end '
+            'RETURNING *'
+            f') INSERT INTO {partition_name} SELECT * FROM moved'
+        ),
+        {'start': month, 'end': add_months(month, 1)}
+    )
+    # indexes and foreign keys are cloned from parent on attach
+    await connection.execute(text(
+        f'ALTER TABLE {TABLE} ATTACH PARTITION {partition_name} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+
+
+async def create_partitions(
+        engine: AsyncEngine, months_ahead: int, today: date
+) -> list[str]:
+    """creates missing partitions from current month up to months_ahead,
+    returns names of created ones"""
+    current_month = today.replace(day=1)
+    async with engine.connect() as connection:
+        partitions = await get_partitions(connection)
+
+    created = []
+    for amount in range(months_ahead + 1):
+        month = add_months(current_month, amount)
+        partition_name = get_partition_name(month)
+        if partition_name in partitions:
+            continue
+        async with engine.begin() as connection:
+            await create_partition(connection, month)
+        created.append(partition_name)
+        logger.info('created partition %s', partition_name)
+
+    return created
+
+
+async def archive_partitions(
+        engine: AsyncEngine, older_than_months: int, today: date,
+        drop: bool = False
+) -> list[str]:
+    """detaches partitions ended more than older_than_months ago,
+    returns names of archived ones"""
+    cutoff = add_months(today.replace(day=1), -older_than_months)
+    archived = []
+    async with engine.connect() as connection:
+        partitions = await get_partitions(connection)
+
+    for partition_name in partitions:
+        month = parse_partition_month(partition_name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        # transaction per partition, detach locks the whole table
+        async with engine.begin() as connection:
+            await connection.execute(text(
+                f'ALTER TABLE {TABLE} DETACH PARTITION {partition_name}'
+            ))
+            if drop:
+                await connection.execute(text(f'DROP TABLE {partition_name}'))
+            else:
+                await connection.execute(text(
+                    f'CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}'
+                ))
+                await connection.execute(text(
+                    f'ALTER TABLE {partition_name} SET SCHEMA {ARCHIVE_SCHEMA}'
+                ))
+        archived.append(partition_name)
+        logger.info('%s partition %s',
+                    'dropped' if drop else 'archived', partition_name)
+
+    return archived
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = commands.add_parser('create')
+    create_parser.add_argument('--months-ahead', type=int, default=3)
+
+    archive_parser = commands.add_parser('archive')
+    archive_parser.add_argument('--older-than-months', type=int, default=24)
+    archive_parser.add_argument('--drop', action='store_true',
+                                help='drop partitions instead of moving '
+                                     f'them into {ARCHIVE_SCHEMA} schema')
+
+    args = parser.parse_args()
+    if getattr(args, 'months_ahead', 0) < 0:
+        parser.error('--months-ahead can`t be negative')
+    if getattr(args, 'older_than_months', 1) < 1:
+        parser.error('--older-than-months should be at least 1')
+    return args
+
+
+async def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        if args.command == 'create':
+            await create_partitions(
+                async_engine, months_ahead=args.months_ahead,
+                today=date.today()
+            )
+        else:
+            await archive_partitions(
+                async_engine, older_than_months=args.older_than_months,
+                today=date.today(), drop=args.drop
+            )
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+"""
+loans counters reconciliation, run from src dir, e.g. by nightly cron:
+
+    python -m maintenance.reconcile
+
+recounts books on_loan and readers active_loans from not returned loans,
+they are kept incrementally by borrows and returns, so this only fixes
+drift, e.g. after loans were edited by hand
+"""
+import argparse
+import asyncio
+import logging
+
+from core.database import async_engine, async_session_maker
+from repositories.stats import StatsRepository
+from services.stats import StatsService
+
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    argparse.ArgumentParser(description=__doc__.split('\n')[1]).parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        # one transaction, so counters are recounted from one snapshot
+        async with async_session_maker() as session:
+            async with session.begin():
+                stats_service = StatsService(
+                    repository=StatsRepository(session)
+                )
+                reconciled = await stats_service.reconcile()
+        logger.info('fixed counters of %s books and %s readers',
+                    reconciled.books, reconciled.readers)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
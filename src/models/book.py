@@ -1,11 +1,36 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy import Text, Index, Computed, text
 
 from core.database import Base
 
 
+# weighted full-text document, title matches rank above autor and description
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(autor, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+
 class Book(Base):
     __tablename__ = 'books'
+    __table_args__ = (
+        # keyset pagination with filters
+        Index('ix_books_autor_id', 'autor', 'id'),
+        Index('ix_books_publish_year_id', 'publish_year', 'id'),
+        Index('ix_books_available_id', 'id',
+              postgresql_where=text('instances > 0')),
+        # full-text and typo tolerant search
+        Index('ix_books_search_vector', 'search_vector',
+              postgresql_using='gin'),
+        Index('ix_books_title_trgm', 'title', postgresql_using='gin',
+              postgresql_ops={'title': 'gin_trgm_ops'}),
+        Index('ix_books_autor_trgm', 'autor', postgresql_using='gin',
+              postgresql_ops={'autor': 'gin_trgm_ops'}),
+    )
+    # don`t fetch search_vector back after every insert
+    __mapper_args__ = {'eager_defaults': False}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(nullable=False)
@@ -13,5 +38,15 @@ class Book(Base):
     publish_year: Mapped[int]
     isbn: Mapped[str] = mapped_column(unique=True)
     instances: Mapped[int] = mapped_column(default=1)
+    # instances on loan, kept by borrow and return statements
+    on_loan: Mapped[int] = mapped_column(default=0, server_default='0')
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    
\ No newline at end of file
+    # bumped by every update, used as ETag
+    version: Mapped[int] = mapped_column(default=1, server_default='1')
+    # maintained by postgres, used in queries only
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        nullable=True,
+        deferred=True
+    )
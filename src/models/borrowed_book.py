@@ -1,16 +1,61 @@
 from datetime import date
 
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index, text
 
 from core.database import Base
 
 
 class BorrowedBook(Base):
+    """loans are range partitioned by return month, not returned loans
+    have NULL return_at and all stay in borrowed_books_open default
+    partition, so active loans queries only touch that one, see
+    maintenance.partitions for creating and archiving partitions"""
     __tablename__ = 'borrowed_books'
+    __table_args__ = (
+        Index('ix_borrowed_books_reader_id_book_id', 'reader_id', 'book_id'),
+        Index('ix_borrowed_books_book_id', 'book_id'),
+        # active loans lookups
+        Index('ix_borrowed_books_reader_id_not_returned', 'reader_id',
+              postgresql_where=text('return_at IS NULL')),
+        # unique indexes of partitioned table must contain return_at,
+        # NULLS NOT DISTINCT keeps one not returned loan of a book per
+        # reader (postgres 15+)
+        Index('ux_borrowed_books_reader_id_book_id_not_returned',
+              'reader_id', 'book_id', 'return_at', unique=True,
+              postgresql_nulls_not_distinct=True,
+              postgresql_where=text('return_at IS NULL')),
+        # circulation reports range scans, covering so that
+        # aggregates are computed from index only
+        Index('ix_borrowed_books_borrow_at', 'borrow_at',
+              postgresql_include=['book_id', 'reader_id', 'return_at',
+                                  'due_at']),
+        # overdue loans not notified yet, rows leave it once notified
+        # or returned, so the overdue job scans only pending ones
+        Index('ix_borrowed_books_due_at_not_notified', 'due_at',
+              postgresql_where=text(
+                  'return_at IS NULL AND overdue_notified_at IS NULL'
+              )),
+        {'postgresql_partition_by': 'RANGE (return_at)'},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    book_id: Mapped[int]
-    reader_id: Mapped[int]
+    # partitioned table can`t have primary key on nullable return_at,
+    # every partition has its own on id instead, so id is primary key
+    # for mapper only and is fetched back on insert
+    id: Mapped[int] = mapped_column(
+        server_default=text("nextval('borrowed_books_id_seq')")
+    )
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey('books.id', ondelete='RESTRICT')
+    )
+    reader_id: Mapped[int] = mapped_column(
+        ForeignKey('readers.id', ondelete='RESTRICT')
+    )
     borrow_at: Mapped[date]
     return_at: Mapped[date] = mapped_column(nullable=True)
-    
\ No newline at end of file
+    # borrow_at plus loan period, not returned after it loan is overdue
+    due_at: Mapped[date]
+    # set by overdue job once notification is written to outbox
+    overdue_notified_at: Mapped[date] = mapped_column(nullable=True)
+
+    __mapper_args__ = {'primary_key': [id], 'eager_defaults': True}
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Index, func, text
+
+from core.database import Base
+
+
+class OutboxMessage(Base):
+    """notifications written in the same transaction as the change they
+    are about, sent later by whatever delivers them, e.g. email worker"""
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        # not sent messages in order of creation
+        Index('ix_outbox_created_at_not_sent', 'created_at',
+              postgresql_where=text('sent_at IS NULL')),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str]
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    sent_at: Mapped[datetime] = mapped_column(nullable=True)
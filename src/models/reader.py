@@ -9,3 +9,7 @@ class Reader(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
     email: Mapped[str] = mapped_column(unique=True)
+    # bumped by every update, used as ETag
+    version: Mapped[int] = mapped_column(default=1, server_default='1')
+    # not returned loans, kept by borrow and return statements
+    active_loans: Mapped[int] = mapped_column(default=0, server_default='0')
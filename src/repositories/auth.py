@@ -1,51 +1,46 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy import select
 
 from models.user import User
 from exceptions.repositories import RowDoesNotExist
+from core.metrics import instrument_repository
 
 
+@instrument_repository
 class AuthRepository:
     model = User
 
-    def __init__(self, engine: AsyncEngine):
-        self.engine = engine
+    def __init__(self, session: AsyncSession):
+        self.session = session
 
     async def register(self, new_user: User) -> int:
         """registers new user and reurns his id"""
-        async with AsyncSession(self.engine) as session:
-            session.add(new_user)
-            await session.flush()
-            new_user_id = new_user.id
+        self.session.add(new_user)
+        await self.session.flush()
 
-            await session.commit()
-
-            return new_user_id
+        return new_user.id
     
     async def get_one_by_id(self, user_id: int):
-        async with AsyncSession(self.engine) as session:
-            try: 
-                query = select(self.model).where(self.model.id == user_id)
-                result = await session.execute(query)
-                user = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with id - {user_id} does not exist'
-                ) from e
-            
-            return user
+        try: 
+            query = select(self.model).where(self.model.id == user_id)
+            result = await self.session.execute(query)
+            user = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {user_id} does not exist'
+            ) from e
+        
+        return user
     
     async def get_one_by_email(self, email: str) -> User:
-        async with AsyncSession(self.engine) as session:
-            try:
-                query = select(self.model).where(self.model.email == email)
-                result = await session.execute(query)
-                user = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with email - {email} does not exist'
-                ) from e
-            
-            return user
-    
\ No newline at end of file
+        try:
+            query = select(self.model).where(self.model.email == email)
+            result = await self.session.execute(query)
+            user = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with email - {email} does not exist'
+            ) from e
+        
+        return user
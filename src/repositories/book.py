@@ -1,59 +1,260 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing import Any, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound, IntegrityError
-from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import RowMapping
+from sqlalchemy import (
+    select, update, func, or_, any_, literal, literal_column,
+    Boolean, Integer, ARRAY, Select
+)
 
 from models.book import Book
-from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
+from exceptions.repositories import (
+    RowDoesNotExist, RowAlreadyExists, RowIsReferenced
+)
+from core.metrics import instrument_repository
 
 
+@instrument_repository
 class BookRepository:
     model = Book
 
-    def __init__(self, engine: AsyncEngine) -> None:
-        self.engine = engine
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    def _filter_page(
+            self,
+            query: Select,
+            limit: int,
+            after_id: Optional[int] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None
+    ) -> Select:
+        query = query.order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if autor is not None:
+            query = query.where(self.model.autor == autor)
+        if publish_year is not None:
+            query = query.where(self.model.publish_year == publish_year)
+        if available is not None:
+            query = query.where(
+                self.model.instances > 0 if available
+                else self.model.instances == 0
+            )
+
+        return query
+
+    async def get_page(
+            self,
+            limit: int,
+            after_id: Optional[int] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None
+    ) -> list[Book]:
+        """returns up to limit books ordered by id (keyset pagination)"""
+        query = self._filter_page(
+            select(self.model), limit, after_id, autor, publish_year, available
+        )
+        books = await self.session.scalars(query)
+
+        return books.all()
 
-    async def get_all(self) -> list[Book]:
-        async with AsyncSession(self.engine) as session:
-            query = select(self.model)
-            books = await session.scalars(query)
+    async def get_page_rows(
+            self,
+            columns: Sequence[str],
+            limit: int,
+            after_id: Optional[int] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None
+    ) -> Sequence[RowMapping]:
+        """the same page as get_page, but only columns as plain rows"""
+        query = self._filter_page(
+            select(*(getattr(self.model, column) for column in columns)),
+            limit, after_id, autor, publish_year, available
+        )
+        result = await self.session.execute(query)
 
-        return books
+        return result.mappings().all()
+
+    async def search(
+            self, query_text: str, limit: int, offset: int = 0
+    ) -> Sequence[tuple[Book, float]]:
+        """full-text search over title, autor and description plus
+        trigram similarity on title and autor, best matches first"""
+        ts_query = func.websearch_to_tsquery('simple', query_text)
+        rank = (
+            func.ts_rank_cd(self.model.search_vector, ts_query)
+            + func.greatest(func.similarity(self.model.title, query_text),
+                            func.similarity(self.model.autor, query_text))
+        ).label('rank')
+        query = (select(self.model, rank)
+                 .where(or_(
+                     self.model.search_vector.bool_op('@@')(ts_query),
+                     self.model.title.bool_op('%')(query_text),
+                     self.model.autor.bool_op('%')(query_text)))
+                 .order_by(rank.desc(), self.model.id)
+                 .limit(limit)
+                 .offset(offset))
+        result = await self.session.execute(query)
+
+        return result.tuples().all()
     
     async def get_one_by_id(self, book_id: int) -> Book:
-        async with AsyncSession(self.engine) as session: 
-            try:
-                query = select(self.model).where(self.model.id == book_id)
-                result = await session.execute(query)
-                book = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with id - {book_id} does not exist'
-                ) from e
+        try:
+            query = select(self.model).where(self.model.id == book_id)
+            result = await self.session.execute(query)
+            book = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {book_id} does not exist'
+            ) from e
         return book
     
+    async def lock_one_by_id(self, book_id: int) -> None:
+        """locks book row until the end of transaction, borrows and
+        returns changing its instances wait for it"""
+        try:
+            query = (select(self.model.id)
+                     .where(self.model.id == book_id)
+                     .with_for_update())
+            result = await self.session.execute(query)
+            result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {book_id} does not exist'
+            ) from e
+
     async def create_one(self, new_book: Book) -> int:
-        async with AsyncSession(self.engine) as session:
-            try:
-                session.add(new_book)
-                await session.flush()
-                new_book_id = new_book.id
-
-                await session.commit()
-            except IntegrityError as e:
-                raise RowAlreadyExists(
-                    f'Row with isbn - {new_book.isbn}, '
-                    'already exists'
-                ) from e
+        try:
+            self.session.add(new_book)
+            await self.session.flush()
+        except IntegrityError as e:
+            raise RowAlreadyExists(
+                f'Row with isbn - {new_book.isbn}, '
+                'already exists'
+            ) from e
         
-        return new_book_id
+        return new_book.id
     
+    async def upsert_many(
+            self, rows: list[dict[str, Any]], update_existing: bool = True
+    ) -> Sequence[tuple[int, str, bool]]:
+        """inserts rows with one statement, rows with existing isbn
+        are updated or skipped, returns (id, isbn, created) of written rows"""
+        query = insert(self.model).values(rows)
+        if update_existing:
+            query = query.on_conflict_do_update(
+                index_elements=[self.model.isbn],
+                set_={
+                    **{column: query.excluded[column]
+                       for column in rows[0] if column != 'isbn'},
+                    # incoming instances are all copies, ones on loan
+                    # aren`t on shelf
+                    'instances': func.greatest(
+                        query.excluded.instances - self.model.on_loan, 0
+                    ),
+                    'version': self.model.version + 1
+                }
+            )
+        else:
+            query = query.on_conflict_do_nothing(
+                index_elements=[self.model.isbn]
+            )
+        # xmax of just inserted row version is 0
+        query = query.returning(
+            self.model.id,
+            self.model.isbn,
+            literal_column('xmax = 0', Boolean)
+        )
+        result = await self.session.execute(query)
+
+        return result.all()
+
     async def update_one(self, book_on_update: Book) -> None:
-        async with AsyncSession(self.engine) as session:
-            session.add(book_on_update)
-            await session.commit()
+        book_on_update.version = self.model.version + 1
+        self.session.add(book_on_update)
+        await self.session.flush()
 
     async def delete_one(self, book_on_delete: Book) -> None:
-        async with AsyncSession(self.engine) as session:
-            await session.delete(book_on_delete)
-            await session.commit()
-            
\ No newline at end of file
+        try:
+            await self.session.delete(book_on_delete)
+            await self.session.flush()
+        except IntegrityError as e:
+            # loans keep their books, foreign key is ON DELETE RESTRICT
+            raise RowIsReferenced(
+                'Row is referenced by borrowed_books'
+            ) from e
+
+    async def decrease_instances(
+            self, book_id: int, amount: int = 1
+    ) -> Optional[int]:
+        """atomically moves instances from shelf to loans if there are
+        enough of them, returns new instances amount or None if no row
+        was updated"""
+        query = (update(self.model)
+                 .where(self.model.id == book_id,
+                        self.model.instances >= amount)
+                 .values(instances=self.model.instances - amount,
+                         on_loan=self.model.on_loan + amount,
+                         version=self.model.version + 1)
+                 .returning(self.model.instances))
+        result = await self.session.execute(query)
+
+        return result.scalar_one_or_none()
+
+    async def increase_instances(
+            self, book_id: int, amount: int = 1
+    ) -> Optional[int]:
+        """atomically moves instances from loans back to shelf, returns
+        new instances amount or None if book does not exist"""
+        query = (update(self.model)
+                 .where(self.model.id == book_id)
+                 .values(instances=self.model.instances + amount,
+                         on_loan=self.model.on_loan - amount,
+                         version=self.model.version + 1)
+                 .returning(self.model.instances))
+        result = await self.session.execute(query)
+
+        return result.scalar_one_or_none()
+
+    async def decrease_instances_many(self, book_ids: list[int]) -> list[int]:
+        """moves one instance of every book having any left to loans
+        with one statement, returns ids of updated books"""
+        query = (update(self.model)
+                 .where(
+                     self.model.id == any_(literal(book_ids, ARRAY(Integer))),
+                     self.model.instances >= 1)
+                 .values(instances=self.model.instances - 1,
+                         on_loan=self.model.on_loan + 1,
+                         version=self.model.version + 1)
+                 .returning(self.model.id))
+        result = await self.session.scalars(query)
+
+        return result.all()
+
+    async def increase_instances_many(self, book_ids: list[int]) -> list[int]:
+        """moves one instance of every book back from loans with one
+        statement, returns ids of updated books"""
+        query = (update(self.model)
+                 .where(
+                     self.model.id == any_(literal(book_ids, ARRAY(Integer))))
+                 .values(instances=self.model.instances + 1,
+                         on_loan=self.model.on_loan - 1,
+                         version=self.model.version + 1)
+                 .returning(self.model.id))
+        result = await self.session.scalars(query)
+
+        return result.all()
+
+    async def get_existing_ids(self, book_ids: list[int]) -> list[int]:
+        query = select(self.model.id).where(
+            self.model.id == any_(literal(book_ids, ARRAY(Integer)))
+        )
+        result = await self.session.scalars(query)
+
+        return result.all()
@@ -1,89 +1,277 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
-from sqlalchemy.exc import NoResultFound
-from sqlalchemy import select
+from datetime import date
+from typing import Any, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy.engine import RowMapping
+from sqlalchemy import (
+    select, insert, update, func, exists, any_, literal, cast, or_, and_,
+    Integer, Date, ARRAY
+)
 
 from models.borrowed_book import BorrowedBook
-from exceptions.repositories import RowDoesNotExist
+from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
+from core.metrics import instrument_repository
 
 
+@instrument_repository
 class BorrowedBookRepository:
     model = BorrowedBook
 
-    def __init__(self, engine: AsyncEngine):
-        self.engine = engine
+    def __init__(self, session: AsyncSession):
+        self.session = session
 
     async def get_all(self) -> list[BorrowedBook]:
-        async with AsyncSession(self.engine) as session:
-            query = select(self.model)
-            result = await session.scalars(query)
+        query = select(self.model)
+        result = await self.session.scalars(query)
 
-            return result.all()
+        return result.all()
 
     async def get_all_by_reader_id(self, reader_id: int) -> list[BorrowedBook]:
-        async with AsyncSession(self.engine) as session:
-            query = select(self.model).where(self.model.reader_id == reader_id)
-            result = await session.scalars(query)
+        query = select(self.model).where(self.model.reader_id == reader_id)
+        result = await self.session.scalars(query)
+
+        return result.all()
+
+    async def get_all_not_returned_by_reader_id(
+            self, reader_id: int
+    ) -> list[BorrowedBook]:
+        query = select(self.model).where(
+            self.model.reader_id == reader_id,
+            self.model.return_at.is_(None)
+        )
+        result = await self.session.scalars(query)
+
+        return result.all()
+
+    async def get_all_not_returned_rows_by_reader_id(
+            self, reader_id: int, columns: Sequence[str]
+    ) -> Sequence[RowMapping]:
+        """not returned loans of reader, only columns as plain rows"""
+        query = (select(*(getattr(self.model, column) for column in columns))
+                 .where(
+                     self.model.reader_id == reader_id,
+                     self.model.return_at.is_(None)))
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
+
+    async def count_not_returned_by_reader_id(self, reader_id: int) -> int:
+        query = (select(func.count())
+                 .select_from(self.model)
+                 .where(
+                     self.model.reader_id == reader_id,
+                     self.model.return_at.is_(None)))
+        result = await self.session.execute(query)
+
+        return result.scalar_one()
+
+    async def exists_not_returned_by_reader_id_and_book_id(
+            self, reader_id: int, book_id: int
+    ) -> bool:
+        query = select(
+            exists().where(
+                self.model.reader_id == reader_id,
+                self.model.book_id == book_id,
+                self.model.return_at.is_(None)
+            )
+        )
+        result = await self.session.execute(query)
 
-            return result.all()
+        return result.scalar_one()
+
+    async def get_circulation(
+            self,
+            date_from: date,
+            date_to: date,
+            today: date,
+            group_by: Optional[str] = None,
+            limit: int = 100,
+            offset: int = 0
+    ) -> Sequence[RowMapping]:
+        """loans borrowed in date range aggregated per borrow month and,
+        if group_by is book_id or reader_id, per that column too"""
+        month = cast(
+            func.date_trunc('month', self.model.borrow_at), Date
+        ).label('month')
+        group_columns = [month]
+        if group_by is not None:
+            group_columns.append(getattr(self.model, group_by))
+
+        is_overdue = or_(
+            and_(self.model.return_at.is_(None), self.model.due_at < today),
+            self.model.return_at > self.model.due_at
+        )
+        query = (select(
+                    *group_columns,
+                    func.count().label('loans'),
+                    func.count(self.model.return_at).label('returned'),
+                    # date - date is amount of days
+                    func.avg(self.model.return_at - self.model.borrow_at)
+                    .label('average_duration_days'),
+                    func.count().filter(is_overdue).label('overdue'))
+                 .where(self.model.borrow_at >= date_from,
+                        self.model.borrow_at <= date_to)
+                 .group_by(*group_columns)
+                 .order_by(*group_columns)
+                 .limit(limit)
+                 .offset(offset))
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
+
+    async def claim_overdue(
+            self, today: date, limit: int
+    ) -> Sequence[RowMapping]:
+        """marks up to limit overdue not notified loans as notified and
+        returns them, loans claimed by concurrent transactions are
+        skipped, so every loan is claimed once across app replicas"""
+        overdue = (select(self.model.id)
+                   .where(
+                       self.model.return_at.is_(None),
+                       self.model.overdue_notified_at.is_(None),
+                       self.model.due_at < today)
+                   .order_by(self.model.due_at)
+                   .limit(limit)
+                   .with_for_update(skip_locked=True))
+        query = (update(self.model)
+                 # return_at condition prunes update to open partition
+                 .where(self.model.return_at.is_(None),
+                        self.model.id.in_(overdue))
+                 .values(overdue_notified_at=today)
+                 .returning(self.model.id,
+                            self.model.reader_id,
+                            self.model.book_id,
+                            self.model.due_at))
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
 
     async def get_all_by_book_id(self, book_id: int) -> list[BorrowedBook]:
-        async with AsyncSession(self.engine) as session:
-            query = select(self.model).where(self.model.book_id == book_id)
-            result = await session.scalars(query) 
+        query = select(self.model).where(self.model.book_id == book_id)
+        result = await self.session.scalars(query) 
 
-            return result.all()
+        return result.all()
         
     async def get_one_by_id(self, borrowed_book_id: int) -> BorrowedBook:
-        async with AsyncSession(self.engine) as session:
-            try: 
-                query = select(self.model).where(self.model.id == borrowed_book_id)
-                result = await session.execute(query)
-                borrowed_book = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with id - {borrowed_book_id}'
-                    'does not exist'
-                ) from e
+        try: 
+            # row loaded earlier in session is refreshed, not reused
+            query = (select(self.model)
+                     .where(self.model.id == borrowed_book_id)
+                     .execution_options(populate_existing=True))
+            result = await self.session.execute(query)
+            borrowed_book = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {borrowed_book_id}'
+                'does not exist'
+            ) from e
         
         return borrowed_book
     
     async def get_one_by_reader_id_and_book_id(
             self, reader_id: int, book_id: int
     ) -> BorrowedBook:
-        async with AsyncSession(self.engine) as session:
-            try:
-                query = (select(self.model)
-                        .where(
-                            self.model.reader_id == reader_id,
-                            self.model.book_id == book_id))
-                result = await session.execute(query)
-                borrowed_book = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with reader_id - {reader_id} '
-                    f'and book_id - {book_id}'
-                    'does not exist'
-                ) from e
+        """returns not returned loan if there is one, else the latest"""
+        try:
+            query = (select(self.model)
+                    .where(
+                        self.model.reader_id == reader_id,
+                        self.model.book_id == book_id)
+                    .order_by(self.model.return_at.desc().nulls_first(),
+                              self.model.id.desc())
+                    .limit(1))
+            result = await self.session.execute(query)
+            borrowed_book = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with reader_id - {reader_id} '
+                f'and book_id - {book_id}'
+                'does not exist'
+            ) from e
             
         return borrowed_book
 
     async def create_one(self, new_borrowed_book: BorrowedBook) -> int:
-        async with AsyncSession(self.engine) as session:
-            session.add(new_borrowed_book)
-            await session.flush()
-            new_borrowed_book_id = new_borrowed_book.id
+        try:
+            self.session.add(new_borrowed_book)
+            await self.session.flush()
+        except IntegrityError as e:
+            # unique index on not returned (reader_id, book_id)
+            raise RowAlreadyExists(
+                'Not returned row with the same reader_id '
+                'and book_id already exists'
+            ) from e
 
-            await session.commit()
+        return new_borrowed_book.id
 
-            return new_borrowed_book_id
+    async def create_many(
+            self, new_borrowed_books: list[dict[str, Any]]
+    ) -> Sequence[tuple[int, int]]:
+        """inserts loans with one statement, returns their (id, book_id)"""
+        try:
+            query = (insert(self.model)
+                     .values(new_borrowed_books)
+                     .returning(self.model.id, self.model.book_id))
+            result = await self.session.execute(query)
+        except IntegrityError as e:
+            raise RowAlreadyExists(
+                'Not returned row with the same reader_id '
+                'and book_id already exists'
+            ) from e
+
+        return result.all()
+
+    async def return_one(
+            self, reader_id: int, book_id: int, return_at: date
+    ) -> int:
+        """sets return_at of not returned loan with one UPDATE,
+        returns its id"""
+        query = (update(self.model)
+                 .where(
+                     self.model.reader_id == reader_id,
+                     self.model.book_id == book_id,
+                     self.model.return_at.is_(None))
+                 .values(return_at=return_at)
+                 .returning(self.model.id))
+        result = await self.session.execute(query)
+        borrowed_book_id = result.scalar_one_or_none()
+        if borrowed_book_id is None:
+            raise RowDoesNotExist(
+                f'Not returned row with reader_id - {reader_id} '
+                f'and book_id - {book_id} does not exist'
+            )
+
+        return borrowed_book_id
     
+    async def return_many(
+            self, reader_id: int, book_ids: list[int], return_at: date
+    ) -> Sequence[tuple[int, int]]:
+        """sets return_at of reader`s not returned loans of books
+        with one UPDATE, returns (id, book_id) of returned loans"""
+        query = (update(self.model)
+                 .where(
+                     self.model.reader_id == reader_id,
+                     self.model.book_id == any_(
+                         literal(book_ids, ARRAY(Integer))),
+                     self.model.return_at.is_(None))
+                 .values(return_at=return_at)
+                 .returning(self.model.id, self.model.book_id))
+        result = await self.session.execute(query)
+
+        return result.all()
+
     async def update_one(self, borrowed_book_on_update: BorrowedBook) -> None:
-        async with AsyncSession(self.engine) as session:
-            session.add(borrowed_book_on_update)
-            await session.commit()
+        try:
+            self.session.add(borrowed_book_on_update)
+            await self.session.flush()
+        except IntegrityError as e:
+            # unique index on not returned (reader_id, book_id)
+            raise RowAlreadyExists(
+                'Not returned row with the same reader_id '
+                'and book_id already exists'
+            ) from e
 
     async def delete_one(self, borrowed_book_on_delete: BorrowedBook) -> None:
-        async with AsyncSession(self.engine) as session:
-            await session.delete(borrowed_book_on_delete)
-            await session.commit() 
-            
\ No newline at end of file
+        await self.session.delete(borrowed_book_on_delete)
+        await self.session.flush()
@@ -0,0 +1,36 @@
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.engine import RowMapping
+from sqlalchemy import select, Column
+
+from core.database import Base
+
+
+class ExportRepository:
+    """streams whole tables through server-side cursor
+
+    Opens its own session because streaming response outlives
+    the request handler that created it.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+
+    def get_columns(self, model: type[Base]) -> list[Column]:
+        """exported columns, without ones computed by postgres"""
+        return [column for column in model.__table__.columns
+                if column.computed is None]
+
+    async def stream_all(
+            self, model: type[Base], chunk_size: int
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """yields table rows ordered by id, chunk_size rows at a time"""
+        async with AsyncSession(self.engine) as session:
+            query = (select(*self.get_columns(model))
+                     .order_by(model.__table__.c.id)
+                     .execution_options(yield_per=chunk_size))
+            result = await session.stream(query)
+
+            async for rows in result.mappings().partitions():
+                yield rows
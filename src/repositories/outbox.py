@@ -0,0 +1,19 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+
+from models.outbox import OutboxMessage
+from core.metrics import instrument_repository
+
+
+@instrument_repository
+class OutboxRepository:
+    model = OutboxMessage
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_many(self, new_messages: list[dict[str, Any]]) -> None:
+        """inserts messages with one statement"""
+        await self.session.execute(insert(self.model).values(new_messages))
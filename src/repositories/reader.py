@@ -1,66 +1,129 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound, IntegrityError
-from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import RowMapping
+from sqlalchemy import select, update, literal_column, Boolean
 
 from models.reader import Reader
-from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
+from exceptions.repositories import (
+    RowDoesNotExist, RowAlreadyExists, RowIsReferenced
+)
+from core.metrics import instrument_repository
 
 
+@instrument_repository
 class ReaderRepository:
     model = Reader
 
-    def __init__(self, engine: AsyncEngine) -> None:
-        self.engine = engine
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
 
     async def get_all(self) -> list[Reader]:
-        async with AsyncSession(self.engine) as session:
-            query = select(self.model)
-            readers = await session.scalars(query)
+        query = select(self.model)
+        readers = await self.session.scalars(query)
+
+        return readers.all()
 
-        return readers
+    async def get_all_rows(
+            self, columns: Sequence[str]
+    ) -> Sequence[RowMapping]:
+        """all readers, only columns as plain rows"""
+        query = select(*(getattr(self.model, column) for column in columns))
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
     
     async def get_one_by_id(self, reader_id: int) -> Reader:
-        async with AsyncSession(self.engine) as session: 
-            try:
-                query = select(self.model).where(self.model.id == reader_id)
-                result = await session.execute(query)
-                reader = result.scalar_one()
-            except NoResultFound as e:
-                raise RowDoesNotExist(
-                    f'Row with id - {reader_id} does not exist'
-                ) from e
+        try:
+            query = select(self.model).where(self.model.id == reader_id)
+            result = await self.session.execute(query)
+            reader = result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {reader_id} does not exist'
+            ) from e
         return reader
     
-    async def create_one(self, new_reader: Reader) -> int:
-        async with AsyncSession(self.engine) as session:
-            try:
-                session.add(new_reader)
-                await session.flush()
-                new_reader_id = new_reader.id
+    async def lock_one_by_id(self, reader_id: int) -> None:
+        """locks reader row until the end of transaction,
+        serializes concurrent writes on behalf of one reader"""
+        try:
+            query = (select(self.model.id)
+                     .where(self.model.id == reader_id)
+                     .with_for_update())
+            result = await self.session.execute(query)
+            result.scalar_one()
+        except NoResultFound as e:
+            raise RowDoesNotExist(
+                f'Row with id - {reader_id} does not exist'
+            ) from e
 
-                await session.commit()
-            except IntegrityError as e:
-                await session.rollback()
-                raise RowAlreadyExists(
-                    'Row with the same field '
-                    'already exists'
-                ) from e
+    async def add_active_loans(self, reader_id: int, amount: int) -> None:
+        query = (update(self.model)
+                 .where(self.model.id == reader_id)
+                 .values(active_loans=self.model.active_loans + amount))
+        await self.session.execute(query)
+
+    async def create_one(self, new_reader: Reader) -> int:
+        try:
+            self.session.add(new_reader)
+            await self.session.flush()
+        except IntegrityError as e:
+            raise RowAlreadyExists(
+                'Row with the same field '
+                'already exists'
+            ) from e
         
-        return new_reader_id
+        return new_reader.id
     
+    async def upsert_many(
+            self, rows: list[dict[str, Any]], update_existing: bool = True
+    ) -> Sequence[tuple[int, str, bool]]:
+        """inserts rows with one statement, rows with existing email
+        are updated or skipped, returns (id, email, created) of written rows"""
+        query = insert(self.model).values(rows)
+        if update_existing:
+            query = query.on_conflict_do_update(
+                index_elements=[self.model.email],
+                set_={
+                    **{column: query.excluded[column]
+                       for column in rows[0] if column != 'email'},
+                    'version': self.model.version + 1
+                }
+            )
+        else:
+            query = query.on_conflict_do_nothing(
+                index_elements=[self.model.email]
+            )
+        # xmax of just inserted row version is 0
+        query = query.returning(
+            self.model.id,
+            self.model.email,
+            literal_column('xmax = 0', Boolean)
+        )
+        result = await self.session.execute(query)
+
+        return result.all()
+
     async def update_one(self, reader_on_update: Reader) -> None:
-        async with AsyncSession(self.engine) as session:
-            try: 
-                session.add(reader_on_update)
-                await session.commit()
-            except IntegrityError as e:
-                await session.rollback()
-                raise RowAlreadyExists(
-                    'Row with the same field '
-                    'already exists'
-                ) from e
+        try: 
+            reader_on_update.version = self.model.version + 1
+            self.session.add(reader_on_update)
+            await self.session.flush()
+        except IntegrityError as e:
+            raise RowAlreadyExists(
+                'Row with the same field '
+                'already exists'
+            ) from e
 
     async def delete_one(self, reader_on_delete: Reader) -> None:
-        async with AsyncSession(self.engine) as session:
-            await session.delete(reader_on_delete)
-            await session.commit()
\ No newline at end of file
+        try:
+            await self.session.delete(reader_on_delete)
+            await self.session.flush()
+        except IntegrityError as e:
+            # loans keep their readers, foreign key is ON DELETE RESTRICT
+            raise RowIsReferenced(
+                'Row is referenced by borrowed_books'
+            ) from e
@@ -0,0 +1,80 @@
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import RowMapping
+from sqlalchemy import select, update, func
+
+from models.book import Book
+from models.reader import Reader
+from models.borrowed_book import BorrowedBook
+from core.metrics import instrument_repository
+
+
+@instrument_repository
+class StatsRepository:
+    """reads loans counters kept in books and readers rows"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_books_availability(
+            self, limit: int, after_id: Optional[int] = None
+    ) -> Sequence[RowMapping]:
+        """one primary key index scan, ordered by book id"""
+        query = (select(Book.id.label('book_id'),
+                        Book.title,
+                        Book.instances.label('on_shelf'),
+                        Book.on_loan)
+                 .order_by(Book.id)
+                 .limit(limit))
+        if after_id is not None:
+            query = query.where(Book.id > after_id)
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
+
+    async def get_readers_active_loans(
+            self, limit: int, after_id: Optional[int] = None
+    ) -> Sequence[RowMapping]:
+        """one primary key index scan, ordered by reader id"""
+        query = (select(Reader.id.label('reader_id'),
+                        Reader.name,
+                        Reader.active_loans)
+                 .order_by(Reader.id)
+                 .limit(limit))
+        if after_id is not None:
+            query = query.where(Reader.id > after_id)
+        result = await self.session.execute(query)
+
+        return result.mappings().all()
+
+    async def reconcile_books(self) -> int:
+        """recounts on_loan from loans, returns amount of fixed books"""
+        actual_on_loan = (select(func.count())
+                          .where(BorrowedBook.book_id == Book.id,
+                                 BorrowedBook.return_at.is_(None))
+                          .scalar_subquery())
+        query = (update(Book)
+                 .where(Book.on_loan != actual_on_loan)
+                 .values(on_loan=actual_on_loan)
+                 .returning(Book.id)
+                 .execution_options(synchronize_session=False))
+        result = await self.session.scalars(query)
+
+        return len(result.all())
+
+    async def reconcile_readers(self) -> int:
+        """recounts active_loans from loans, returns amount of fixed
+        readers"""
+        actual_active_loans = (select(func.count())
+                               .where(BorrowedBook.reader_id == Reader.id,
+                                      BorrowedBook.return_at.is_(None))
+                               .scalar_subquery())
+        query = (update(Reader)
+                 .where(Reader.active_loans != actual_active_loans)
+                 .values(active_loans=actual_active_loans)
+                 .returning(Reader.id)
+                 .execution_options(synchronize_session=False))
+        result = await self.session.scalars(query)
+
+        return len(result.all())
@@ -26,7 +26,37 @@ class BookUpdateSchema(BookCreateSchema):
 
 class BookOutputSchema(BookUpdateSchema):
     id: int
+    version: int
 
 
 class BookSchema(BookCreateSchema):
     id: int
+
+
+class BookPageSchema(BaseModel):
+    items: list[BookOutputSchema]
+    next_cursor: Optional[str] = None
+
+
+class BookSearchResultSchema(BaseModel):
+    book: BookOutputSchema
+    rank: float
+
+
+class BookSearchPageSchema(BaseModel):
+    items: list[BookSearchResultSchema]
+    next_offset: Optional[int] = None
+
+
+class BookSummarySchema(BaseModel):
+    """books list view, without description"""
+    id: int
+    title: str
+    autor: str
+    instances: int
+    version: int
+
+
+class BookSummaryPageSchema(BaseModel):
+    items: list[BookSummarySchema]
+    next_cursor: Optional[str] = None
@@ -1,4 +1,5 @@
 from datetime import date
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -8,6 +9,7 @@ class BorrowedBookCreateSchema(BaseModel):
     book_id: int = Field(ge=1)
     reader_id: int = Field(ge=1)
     borrow_at: date
+    due_at: date
 
     class Config:
         from_attributes = True
@@ -21,3 +23,34 @@ class BorrowedBookUpdateSchema(BaseModel):
 class BorrowedBookOutputSchema(BorrowedBookCreateSchema):
     id: int = Field(ge=1)
     return_at: Optional[date] = None
+
+
+class BorrowedBookSummarySchema(BaseModel):
+    """reader`s not returned loans view"""
+    id: int
+    book_id: int
+    borrow_at: date
+    due_at: date
+
+
+class BorrowedBookBatchSchema(BaseModel):
+    reader_id: int = Field(ge=1)
+    book_ids: list[int] = Field(min_length=1, max_length=100)
+
+
+class BorrowedBookBatchStatus(str, Enum):
+    borrowed = 'borrowed'
+    returned = 'returned'
+    # book id repeated in the same batch
+    duplicate = 'duplicate'
+    already_borrowed = 'already_borrowed'
+    limit_exceeded = 'limit_exceeded'
+    no_instances = 'no_instances'
+    book_not_found = 'book_not_found'
+    not_borrowed = 'not_borrowed'
+
+
+class BorrowedBookBatchItemSchema(BaseModel):
+    book_id: int
+    borrowed_book_id: Optional[int] = None
+    status: BorrowedBookBatchStatus
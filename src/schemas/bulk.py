@@ -0,0 +1,21 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class BulkConflictStrategy(str, Enum):
+    update = 'update'
+    skip = 'skip'
+
+
+class BulkItemStatus(str, Enum):
+    created = 'created'
+    updated = 'updated'
+    conflict = 'conflict'
+
+
+class BulkItemResultSchema(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: BulkItemStatus
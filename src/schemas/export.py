@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ExportEntity(str, Enum):
+    books = 'books'
+    readers = 'readers'
+    borrowed_books = 'borrowed-books'
+
+
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
@@ -18,3 +18,10 @@ class ReaderUpdateSchema(ReaderCreateSchema):
 
 class ReaderOutputSchema(ReaderCreateSchema):
     id: int
+    version: int
+
+
+class ReaderSummarySchema(BaseModel):
+    id: int
+    name: str
+    version: int
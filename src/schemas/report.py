@@ -0,0 +1,29 @@
+from datetime import date
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CirculationGroupBy(str, Enum):
+    """loans are always grouped by borrow month, optionally also by
+    book or reader"""
+    month = 'month'
+    book = 'book'
+    reader = 'reader'
+
+
+class CirculationRowSchema(BaseModel):
+    month: date
+    book_id: Optional[int] = None
+    reader_id: Optional[int] = None
+    loans: int
+    returned: int
+    # of returned loans only
+    average_duration_days: Optional[float] = None
+    overdue: int
+
+
+class CirculationReportSchema(BaseModel):
+    items: list[CirculationRowSchema]
+    next_offset: Optional[int] = None
@@ -0,0 +1,32 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class BookAvailabilitySchema(BaseModel):
+    book_id: int
+    title: str
+    on_shelf: int
+    on_loan: int
+
+
+class BookAvailabilityPageSchema(BaseModel):
+    items: list[BookAvailabilitySchema]
+    next_cursor: Optional[str] = None
+
+
+class ReaderActiveLoansSchema(BaseModel):
+    reader_id: int
+    name: str
+    active_loans: int
+
+
+class ReaderActiveLoansPageSchema(BaseModel):
+    items: list[ReaderActiveLoansSchema]
+    next_cursor: Optional[str] = None
+
+
+class StatsReconcileSchema(BaseModel):
+    """amount of counters found drifted and fixed"""
+    books: int
+    readers: int
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ListView(str, Enum):
+    """columns returned by list endpoints"""
+    summary = 'summary'
+    full = 'full'
@@ -1,26 +1,101 @@
-from datetime import datetime, timedelta
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from time import time
+from typing import Any, Optional
 
 from jose import jwt
+from jose.exceptions import JWTError
 
-from core.settings import SECRET_KEY, ALGORITHM
+from core.cache import TTLCache
+from core.metrics import register_cache_metrics
+from core.settings import SECRET_KEY, ALGORITHM, auth_settings
+
+
+class JWTKeyring:
+    """signing keys by kid
+
+    Tokens are signed with the active key and carry its kid in header,
+    so the active key can be rotated while tokens signed with older keys
+    stay valid until they expire or their key is removed.
+    """
+
+    def __init__(
+            self,
+            keys: dict[str, str],
+            active_kid: str,
+            algorithm: str,
+            legacy_key: Optional[str] = None
+    ) -> None:
+        self.keys = keys
+        self.active_kid = active_kid
+        self.algorithm = algorithm
+        # verifies tokens issued without kid, before keyring was introduced
+        self.legacy_key = legacy_key
+
+    def sign(self, payload: dict[str, Any]) -> str:
+        return jwt.encode(
+            payload,
+            self.keys[self.active_kid],
+            algorithm=self.algorithm,
+            headers={'kid': self.active_kid}
+        )
+
+    def verify(self, token: str) -> dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = self.legacy_key if kid is None else self.keys.get(kid)
+        if key is None:
+            raise JWTError(f'unknown signing key - {kid}')
+
+        return jwt.decode(token, key, algorithms=self.algorithm)
+
+
+def build_jwt_keyring() -> JWTKeyring:
+    if auth_settings.jwt_keys:
+        return JWTKeyring(
+            keys={kid: key.get_secret_value()
+                  for kid, key in auth_settings.jwt_keys.items()},
+            active_kid=auth_settings.jwt_active_kid,
+            algorithm=ALGORITHM,
+            legacy_key=SECRET_KEY
+        )
+    return JWTKeyring(
+        keys={'default': SECRET_KEY},
+        active_kid='default',
+        algorithm=ALGORITHM,
+        legacy_key=SECRET_KEY
+    )
+
+
+jwt_keyring = build_jwt_keyring()
+
+# payloads of verified tokens by token digest, kept until token expires
+verified_token_cache: TTLCache[dict[str, Any]] = TTLCache(
+    maxsize=auth_settings.token_cache_size,
+    ttl=auth_settings.token_lifetime
+)
+register_cache_metrics('verified_token', verified_token_cache)
 
 
 def get_signed_jwt(user_id: int) -> str:
     payload = {
         'user_id': user_id,
-        'exp': datetime.now() + timedelta(hours=1)
+        'exp': datetime.now(timezone.utc) + timedelta(
+            seconds=auth_settings.token_lifetime
+        )
     }
-    encrypted_payload = jwt.encode(payload, 
-                                   SECRET_KEY, 
-                                   algorithm=ALGORITHM)
-    return encrypted_payload
+    return jwt_keyring.sign(payload)
 
 
 def get_jwt_payload(token: str) -> dict[str, Any]:
-    payload = jwt.decode(
-        token,
-        SECRET_KEY,
-        algorithms=ALGORITHM
+    """verifies token, signature of already seen token isn`t checked again"""
+    token_digest = sha256(token.encode()).digest()
+    payload = verified_token_cache.get(token_digest)
+    if payload is not None:
+        return payload
+
+    payload = jwt_keyring.verify(token)
+    verified_token_cache.set(
+        token_digest, payload, ttl=payload.get('exp', 0) - time()
     )
+
     return payload
@@ -1,5 +1,18 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, TypeVar
+
 from passlib.context import CryptContext
 
+from core.settings import auth_settings
+from core.metrics import (
+    PASSWORD_HASHING_WAIT_DURATION,
+    register_password_hashing_metrics
+)
+
+
+T = TypeVar('T')
 
 pwd_context = CryptContext(
     schemes=['bcrypt']
@@ -11,3 +24,64 @@ def get_password_hash(password: str) -> str:
 
 def check_password(entered_password: str, db_password_hash: str) -> bool:
     return pwd_context.verify(entered_password, db_password_hash)
+
+
+class PasswordHashingPool:
+    """runs bcrypt in worker threads instead of the event loop
+
+    bcrypt releases the GIL while hashing, so up to max_workers hashes
+    are computed in parallel, the rest wait in queue.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='password-hashing'
+        )
+        self._semaphore = asyncio.Semaphore(max_workers)
+        # queueing metrics, exported by core.metrics, wait time is
+        # observed into PASSWORD_HASHING_WAIT_DURATION
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        queued_at = perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        PASSWORD_HASHING_WAIT_DURATION.observe(perf_counter() - queued_at)
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=auth_settings.password_hashing_workers
+)
+register_password_hashing_metrics(password_hashing_pool)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hashing_pool.run(get_password_hash, password)
+
+
+async def check_password_async(
+        entered_password: str, db_password_hash: str
+) -> bool:
+    return await password_hashing_pool.run(
+        check_password, entered_password, db_password_hash
+    )
@@ -1,11 +1,14 @@
+from typing import Optional
+
 from repositories.auth import AuthRepository
+from core.cache import TTLCache
 from exceptions.services import (
     UserDoesNotExist,
     UserPasswordVerificationFailedError
 )
 from exceptions.repositories import RowDoesNotExist
 from models.user import User
-from security.password import get_password_hash, check_password
+from security.password import get_password_hash_async, check_password_async
 from security.jwt import get_signed_jwt
 from schemas.auth import (
     UserRegisterationSchema,
@@ -15,11 +18,16 @@ from schemas.auth import (
 
 
 class AuthService:
-    def __init__(self, repository: AuthRepository):
+    def __init__(
+            self,
+            repository: AuthRepository,
+            user_cache: Optional[TTLCache[UserSchema]] = None
+    ):
         self.repository = repository
+        self.user_cache = user_cache
 
     async def register(self, new_user: UserRegisterationSchema) -> int:
-        new_user_password_hash = get_password_hash(
+        new_user_password_hash = await get_password_hash_async(
             new_user.password
         )
         new_user.password = new_user_password_hash
@@ -29,7 +37,16 @@ class AuthService:
 
         return new_user_id
     
-    async def get_one_by_id(self, user_id: int) -> UserSchema:
+    async def get_one_by_id(
+            self, user_id: int, cache_ttl: Optional[float] = None
+    ) -> UserSchema:
+        """returns user, from user_cache if it is set,
+        cache_ttl limits how long the user stays cached"""
+        if self.user_cache is not None:
+            cached_user = self.user_cache.get(user_id)
+            if cached_user is not None:
+                return cached_user
+
         try:
             user = await self.repository.get_one_by_id(user_id=user_id)
         except RowDoesNotExist as e:
@@ -37,8 +54,17 @@ class AuthService:
                 f'User with id - {user_id} ' \
                 f'does not exist'
             ) from e
+        user = UserSchema.model_validate(user)
+
+        if self.user_cache is not None:
+            self.user_cache.set(user_id, user, ttl=cache_ttl)
         
-        return UserSchema.model_validate(user)
+        return user
+
+    def invalidate_cached_user(self, user_id: int) -> None:
+        """must be called after user deletion or password change"""
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
     
     async def login(self, user_credentials: UserLoginSchema) -> str:
         """logins user and retrun jwt access token"""
@@ -52,7 +78,7 @@ class AuthService:
                 f'does not exist'
             ) from e
         
-        is_passwords_equal = check_password(
+        is_passwords_equal = await check_password_async(
             user_credentials.password,
             user.password
         )
@@ -1,29 +1,152 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
 from repositories.book import BookRepository
-from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
+from core.pagination import encode_cursor, decode_cursor
+from core.cache import SchemaCache
+from core.serialization import get_schema_columns
+from core.database import run_after_commit
+from services.bulk import upsert_in_batches
+from exceptions.repositories import (
+    RowDoesNotExist, RowAlreadyExists, RowIsReferenced
+)
 from exceptions.services import (
     BookDoesNotExist, 
     BookISBNAlreadyExists,
-    BookDoesNotHaveAnyInstancesError
+    BookDoesNotHaveAnyInstancesError,
+    BookHasBorrowedBooks
 )
 from models.book import Book
 from schemas.book import (
     BookOutputSchema,
+    BookPageSchema,
+    BookSummarySchema,
+    BookSummaryPageSchema,
+    BookSearchResultSchema,
+    BookSearchPageSchema,
     BookCreateSchema,
     BookUpdateSchema
 )
+from schemas.bulk import BulkItemResultSchema, BulkItemStatus
 
 
 class BookService:
-    def __init__(self, repository: BookRepository):
+    def __init__(
+            self,
+            repository: BookRepository,
+            cache: Optional[SchemaCache[BookOutputSchema]] = None
+    ):
         self.repository = repository
+        self.cache = cache
+
+    def _invalidate_cached(self, *book_ids: int) -> None:
+        """drops books from cache once request transaction is commited,
+
+        read which loaded the row before commit can still store it after
+        invalidation, such stale entry lives until CACHE_TTL expires
+        """
+        if self.cache is not None and book_ids:
+            run_after_commit(self.repository.session,
+                             lambda: self.cache.invalidate(*book_ids))
+    
+    async def get_page(
+            self,
+            limit: int,
+            after: Optional[str] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None
+    ) -> BookPageSchema:
+        """returns one page of books and cursor of the next one"""
+        after_id = decode_cursor(after) if after is not None else None
+        # one extra row tells whether the next page exists
+        books_orm = await self.repository.get_page(
+            limit=limit + 1,
+            after_id=after_id,
+            autor=autor,
+            publish_year=publish_year,
+            available=available
+        )
+        books = [BookOutputSchema.model_validate(book)
+                 for book in books_orm[:limit]]
+        next_cursor = (encode_cursor(books[-1].id)
+                       if len(books_orm) > limit else None)
+
+        return BookPageSchema(items=books, next_cursor=next_cursor)
     
-    async def get_all(self) -> list[BookOutputSchema]:
-        books_orm = await self.repository.get_all()
-        books = [BookOutputSchema.model_validate(book) 
-                 for book in books_orm]
-        return books
+    async def get_page_rows(
+            self,
+            limit: int,
+            after: Optional[str] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None,
+            schema: type[BaseModel] = BookOutputSchema
+    ) -> dict[str, Any]:
+        """the same page as get_page, but only schema columns as plain
+        dicts, no schemas are built"""
+        after_id = decode_cursor(after) if after is not None else None
+        books = await self.repository.get_page_rows(
+            columns=get_schema_columns(schema),
+            limit=limit + 1,
+            after_id=after_id,
+            autor=autor,
+            publish_year=publish_year,
+            available=available
+        )
+        next_cursor = (encode_cursor(books[limit - 1]['id'])
+                       if len(books) > limit else None)
+
+        return {
+            'items': [dict(book) for book in books[:limit]],
+            'next_cursor': next_cursor
+        }
+
+    async def get_summary_page(
+            self,
+            limit: int,
+            after: Optional[str] = None,
+            autor: Optional[str] = None,
+            publish_year: Optional[int] = None,
+            available: Optional[bool] = None
+    ) -> BookSummaryPageSchema:
+        """one page of books, only columns of summary view are selected"""
+        books_page = await self.get_page_rows(
+            limit=limit,
+            after=after,
+            autor=autor,
+            publish_year=publish_year,
+            available=available,
+            schema=BookSummarySchema
+        )
+
+        return BookSummaryPageSchema.model_validate(books_page)
+
+    async def search(
+            self, query_text: str, limit: int, offset: int = 0
+    ) -> BookSearchPageSchema:
+        """returns one page of ranked search results"""
+        # one extra row tells whether the next page exists
+        found_books = await self.repository.search(
+            query_text=query_text, limit=limit + 1, offset=offset
+        )
+        results = [
+            BookSearchResultSchema(
+                book=BookOutputSchema.model_validate(book), rank=rank
+            )
+            for book, rank in found_books[:limit]
+        ]
+        next_offset = offset + limit if len(found_books) > limit else None
+
+        return BookSearchPageSchema(items=results, next_offset=next_offset)
     
     async def get_one_by_id(self, book_id: int) -> BookOutputSchema:
+        if self.cache is not None:
+            cached_book = await self.cache.get(book_id)
+            if cached_book is not None:
+                return cached_book
+
         try:
             book_orm = await self.repository.get_one_by_id(book_id=book_id)
         except RowDoesNotExist as e:
@@ -33,6 +156,9 @@ class BookService:
             ) from e
         book = BookOutputSchema.model_validate(book_orm)
 
+        if self.cache is not None:
+            await self.cache.set(book_id, book)
+
         return book
     
     async def create_one(self, new_book: BookCreateSchema) -> int:
@@ -47,6 +173,25 @@ class BookService:
 
         return new_book_id
     
+    async def bulk_upsert(
+            self,
+            books: list[BookCreateSchema],
+            update_existing: bool = True
+    ) -> list[BulkItemResultSchema]:
+        """creates books in batches, books with already existing isbn
+        are updated or, if update_existing is False, reported as conflicts"""
+        results = await upsert_in_batches(
+            rows=[book.model_dump() for book in books],
+            key='isbn',
+            upsert_many=lambda rows: self.repository.upsert_many(
+                rows=rows, update_existing=update_existing
+            )
+        )
+        self._invalidate_cached(*(result.id for result in results
+                                  if result.status is BulkItemStatus.updated))
+
+        return results
+    
     async def update_one(self, book_id: int, book_on_update: BookUpdateSchema) -> None:
         try: 
             old_book_orm = await self.repository.get_one_by_id(book_id=book_id)
@@ -60,40 +205,98 @@ class BookService:
             setattr(old_book_orm, field, value)
         
         await self.repository.update_one(book_on_update=old_book_orm)
+        self._invalidate_cached(book_id)
 
     async def delete_one(self, book_id: int) -> None:
-        book_on_delete = await self.get_one_by_id(book_id=book_id)
-        await self.repository.delete_one(book_on_delete=book_on_delete)
-
-    async def increase_book_instances(self, book_id: int, amount: int = 1) -> None:
-        """increase book instances amount and updates book"""
         try:
-            book_orm = await self.repository.get_one_by_id(book_id=book_id)
+            # on_loan can`t change until transaction ends
+            await self.repository.lock_one_by_id(book_id=book_id)
+            book_on_delete = await self.repository.get_one_by_id(book_id=book_id)
         except RowDoesNotExist as e:
             raise BookDoesNotExist(
                 f'Book with id - {book_id}'
                 'does not exist'
             ) from e
 
-        book_orm.instances += amount
+        if book_on_delete.on_loan > 0:
+            raise BookHasBorrowedBooks(
+                f'Book with id - {book_id} has '
+                f'{book_on_delete.on_loan} not returned instances'
+            )
 
-        await self.repository.update_one(book_on_update=book_orm)
-
-    async def decrease_book_instances(self, book_id: int, amount: int = 1) -> None:
-        """decrease book instances amount and updates book"""
         try:
-            book_orm = await self.repository.get_one_by_id(book_id=book_id)
-        except RowDoesNotExist as e:
+            await self.repository.delete_one(book_on_delete=book_on_delete)
+        except RowIsReferenced as e:
+            raise BookHasBorrowedBooks(
+                f'Book with id - {book_id} has returned loans, '
+                'their history is kept'
+            ) from e
+        self._invalidate_cached(book_id)
+
+    async def increase_book_instances(self, book_id: int, amount: int = 1) -> int:
+        """increase book instances amount in one statement,
+        returns new instances amount"""
+        instances = await self.repository.increase_instances(
+            book_id=book_id, amount=amount
+        )
+        if instances is None:
             raise BookDoesNotExist(
                 f'Book with id - {book_id}'
                 'does not exist'
-            ) from e
+            )
+        self._invalidate_cached(book_id)
+
+        return instances
+
+    async def decrease_book_instances(self, book_id: int, amount: int = 1) -> int:
+        """decrease book instances amount in one conditional statement,
+        returns new instances amount"""
+        instances = await self.repository.decrease_instances(
+            book_id=book_id, amount=amount
+        )
+        if instances is None:
+            # nothing was updated, book is missing or has no instances left
+            try:
+                await self.repository.get_one_by_id(book_id=book_id)
+            except RowDoesNotExist as e:
+                raise BookDoesNotExist(
+                    f'Book with id - {book_id}'
+                    'does not exist'
+                ) from e
 
-        if book_orm.instances == 0:
             raise BookDoesNotHaveAnyInstancesError(
                 'Can`t decrease book instances amount less than 0'
-            ) 
-        
-        book_orm.instances -= amount
+            )
+        self._invalidate_cached(book_id)
+
+        return instances
+
+    async def decrease_books_instances(
+            self, book_ids: list[int]
+    ) -> tuple[list[int], list[int]]:
+        """decreases instances of every book by one in one statement,
+        returns ids of decreased and of not existing books,
+        the rest haven`t got any instances"""
+        decreased_ids = await self.repository.decrease_instances_many(
+            book_ids=book_ids
+        )
+        self._invalidate_cached(*decreased_ids)
+
+        not_decreased_ids = set(book_ids).difference(decreased_ids)
+        if not not_decreased_ids:
+            return decreased_ids, []
+        existing_ids = await self.repository.get_existing_ids(
+            book_ids=list(not_decreased_ids)
+        )
+
+        return decreased_ids, list(not_decreased_ids.difference(existing_ids))
+
+    async def increase_books_instances(self, book_ids: list[int]) -> list[int]:
+        """increases instances of every book by one in one statement,
+        returns ids of increased books"""
+        increased_ids = await self.repository.increase_instances_many(
+            book_ids=book_ids
+        )
+        self._invalidate_cached(*increased_ids)
 
-        await self.repository.update_one(book_on_update=book_orm)
+        return increased_ids
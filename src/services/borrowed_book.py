@@ -1,9 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any
+
+from pydantic import BaseModel
 
 from repositories.borrowed_book import BorrowedBookRepository
-from exceptions.repositories import RowDoesNotExist
+from core.serialization import get_schema_columns
+from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
 from models.borrowed_book import BorrowedBook
 from services.book import BookService
+from services.reader import ReaderService
 from exceptions.services import (
     BorrowedBookDoesNotExist,
     BorrowedBookCountPerReaderError,
@@ -11,6 +16,7 @@ from exceptions.services import (
     BorrowedBookUnableToBorrowBook,
     BorrowedBookAlreadyBorrowed,
     BorrowedBookAlreadyReturned,
+    ReaderDoesNotExist,
     # Book errors
     BookDoesNotHaveAnyInstancesError,
 )
@@ -18,20 +24,27 @@ from schemas.borrowed_book import (
     BorrowedBookOutputSchema,
     BorrowedBookCreateSchema,
     BorrowedBookUpdateSchema,
+    BorrowedBookSummarySchema,
+    BorrowedBookBatchItemSchema,
+    BorrowedBookBatchStatus,
 )
 
 
 class NoMoreThanTreeBorrowedBooksValidator:
-    """validates reader`s borrowed books amount"""
+    """validates reader`s not returned borrowed books amount"""
+
+    max_borrowed_books = 3
 
     def __init__(self, repository: BorrowedBookRepository) -> None:
         self.repository = repository
 
     async def is_satisfied(self, reader_id: int):
-        reader_borrowed_books = await self.repository.get_all_by_reader_id(
-            reader_id=reader_id
+        reader_borrowed_books_count = (
+            await self.repository.count_not_returned_by_reader_id(
+                reader_id=reader_id
+            )
         )
-        if len(reader_borrowed_books) < 3:
+        if reader_borrowed_books_count >= self.max_borrowed_books:
             raise BorrowedBookCountPerReaderError(
                 "BorrowedBook can be borrowed, "
                 f"Reader with id = {reader_id} already "
@@ -41,15 +54,22 @@ class NoMoreThanTreeBorrowedBooksValidator:
 
 class BorrowedBookService:
     def __init__(
-        self, repository: BorrowedBookRepository, book_service: BookService
+        self,
+        repository: BorrowedBookRepository,
+        book_service: BookService,
+        reader_service: ReaderService,
+        loan_period_days: int,
     ) -> None:
         self.repository = repository
+        self.loan_period = timedelta(days=loan_period_days)
         # validators
         self.no_more_than_thee_borrowed_books_validator = (
             NoMoreThanTreeBorrowedBooksValidator(self.repository)
         )
         # for managing on book instance count
         self.book_service = book_service
+        # for locking reader while his loans are checked and changed
+        self.reader_service = reader_service
 
     async def get_all(self) -> list[BorrowedBookOutputSchema]:
         borrowed_books_orm = await self.repository.get_all()
@@ -63,18 +83,44 @@ class BorrowedBookService:
     async def get_all_not_returned_by_reader_id(
         self, reader_id: int
     ) -> list[BorrowedBookOutputSchema]:
-        borrowed_books_orm = await self.repository.get_all_by_reader_id(
+        borrowed_books_orm = await self.repository.get_all_not_returned_by_reader_id(
             reader_id=reader_id
         )
-        print(borrowed_books_orm)
         not_returned_borrowed_books = [
             BorrowedBookOutputSchema.model_validate(borrowed_book)
             for borrowed_book in borrowed_books_orm
-            if borrowed_book.return_at is None
         ]
 
         return not_returned_borrowed_books
 
+    async def get_all_not_returned_rows_by_reader_id(
+        self, reader_id: int, schema: type[BaseModel] = BorrowedBookOutputSchema
+    ) -> list[dict[str, Any]]:
+        """not returned loans, only schema columns as plain dicts"""
+        borrowed_books = (
+            await self.repository.get_all_not_returned_rows_by_reader_id(
+                reader_id=reader_id, columns=get_schema_columns(schema)
+            )
+        )
+
+        return [dict(borrowed_book) for borrowed_book in borrowed_books]
+
+    async def get_all_not_returned_summary_by_reader_id(
+        self, reader_id: int
+    ) -> list[BorrowedBookSummarySchema]:
+        """not returned loans, only columns of summary view are selected"""
+        borrowed_books = (
+            await self.repository.get_all_not_returned_rows_by_reader_id(
+                reader_id=reader_id,
+                columns=get_schema_columns(BorrowedBookSummarySchema),
+            )
+        )
+
+        return [
+            BorrowedBookSummarySchema.model_validate(borrowed_book)
+            for borrowed_book in borrowed_books
+        ]
+
     async def get_all_by_book_id(self, book_id: int) -> list[BorrowedBookOutputSchema]:
         borrowed_books_orm = await self.repository.get_all_by_book_id(book_id=book_id)
         borrowed_books = [
@@ -98,19 +144,22 @@ class BorrowedBookService:
         return borrowed_book
 
     async def create_one(self, book_id: int, reader_id: int) -> int:
+        # concurrent borrows of one reader wait here until this transaction
+        # ends, so checks below can`t be raced, other readers aren`t blocked
+        await self.reader_service.lock_one_by_id(reader_id=reader_id)
+
         # check whether reader already have got a borrowed_book
-        try:
-            await self.repository.get_one_by_reader_id_and_book_id(
-                reader_id=reader_id, book_id=book_id    
+        is_already_borrowed = (
+            await self.repository.exists_not_returned_by_reader_id_and_book_id(
+                reader_id=reader_id, book_id=book_id
             )
-        except RowDoesNotExist:
-            pass
-        else:
+        )
+        if is_already_borrowed:
             raise BorrowedBookAlreadyBorrowed(
                 "Reader already have BorrowedBook"
-            ) 
+            )
 
-        self.no_more_than_thee_borrowed_books_validator.is_satisfied(
+        await self.no_more_than_thee_borrowed_books_validator.is_satisfied(
             reader_id=reader_id
         )
 
@@ -119,9 +168,11 @@ class BorrowedBookService:
             book_id=book_id,
             reader_id=reader_id,
             borrow_at=borrow_at,
+            due_at=borrow_at + self.loan_period,
         )
 
-        # try to decrease book instances
+        # decrease book instances with one conditional UPDATE,
+        # loan below is inserted in the same request transaction
         try:
             await self.book_service.decrease_book_instances(
                 book_id=new_borrowed_book.book_id
@@ -132,77 +183,301 @@ class BorrowedBookService:
             ) from e
 
         new_borrowed_book_orm = BorrowedBook(**new_borrowed_book.model_dump())
-        new_borrowed_book_id = await self.repository.create_one(
-            new_borrowed_book=new_borrowed_book_orm
-        )
+        try:
+            new_borrowed_book_id = await self.repository.create_one(
+                new_borrowed_book=new_borrowed_book_orm
+            )
+        except RowAlreadyExists as e:
+            raise BorrowedBookAlreadyBorrowed(
+                "Reader already have BorrowedBook"
+            ) from e
+        await self.reader_service.add_active_loans(reader_id=reader_id, amount=1)
 
         return new_borrowed_book_id
 
+    async def create_many(
+        self, reader_id: int, book_ids: list[int]
+    ) -> list[BorrowedBookBatchItemSchema]:
+        """borrows several books for reader at once, books which can`t be
+        borrowed are reported in results instead of failing whole batch"""
+        await self.reader_service.lock_one_by_id(reader_id=reader_id)
+
+        statuses: dict[int, BorrowedBookBatchStatus] = {}
+        not_returned_book_ids = {
+            borrowed_book.book_id
+            for borrowed_book in (
+                await self.repository.get_all_not_returned_by_reader_id(
+                    reader_id=reader_id
+                )
+            )
+        }
+        # limit is validated once for the whole batch
+        free_slots = (
+            self.no_more_than_thee_borrowed_books_validator.max_borrowed_books
+            - len(not_returned_book_ids)
+        )
+        candidate_book_ids = []
+        for book_id in dict.fromkeys(book_ids):
+            if book_id in not_returned_book_ids:
+                statuses[book_id] = BorrowedBookBatchStatus.already_borrowed
+            else:
+                candidate_book_ids.append(book_id)
+
+        # slots are taken only by books whose instances were decreased,
+        # books failed in a round free their slots for the next candidates
+        decreased_book_ids: list[int] = []
+        while candidate_book_ids and len(decreased_book_ids) < free_slots:
+            round_size = free_slots - len(decreased_book_ids)
+            book_ids_on_borrow = candidate_book_ids[:round_size]
+            candidate_book_ids = candidate_book_ids[round_size:]
+            round_decreased_book_ids, not_found_book_ids = (
+                await self.book_service.decrease_books_instances(
+                    book_ids=book_ids_on_borrow
+                )
+            )
+            for book_id in book_ids_on_borrow:
+                statuses[book_id] = BorrowedBookBatchStatus.no_instances
+            for book_id in not_found_book_ids:
+                statuses[book_id] = BorrowedBookBatchStatus.book_not_found
+            decreased_book_ids.extend(round_decreased_book_ids)
+        for book_id in candidate_book_ids:
+            statuses[book_id] = BorrowedBookBatchStatus.limit_exceeded
+
+        borrowed_book_ids: dict[int, int] = {}
+        if decreased_book_ids:
+            borrow_at = datetime.now().date()
+            new_borrowed_books = [
+                BorrowedBookCreateSchema(
+                    book_id=book_id,
+                    reader_id=reader_id,
+                    borrow_at=borrow_at,
+                    due_at=borrow_at + self.loan_period,
+                ).model_dump()
+                for book_id in decreased_book_ids
+            ]
+            try:
+                created_borrowed_books = await self.repository.create_many(
+                    new_borrowed_books=new_borrowed_books
+                )
+            except RowAlreadyExists as e:
+                raise BorrowedBookAlreadyBorrowed(
+                    "Reader already have BorrowedBook"
+                ) from e
+
+            for borrowed_book_id, book_id in created_borrowed_books:
+                borrowed_book_ids[book_id] = borrowed_book_id
+                statuses[book_id] = BorrowedBookBatchStatus.borrowed
+            await self.reader_service.add_active_loans(
+                reader_id=reader_id, amount=len(created_borrowed_books)
+            )
+
+        return self._get_batch_results(book_ids, statuses, borrowed_book_ids)
+
     async def update_one(
         self, borrowed_book_id: int, borrowed_book_on_update: BorrowedBookUpdateSchema
     ) -> None:
-        try:
-            old_borrowed_book = await self.repository.get_one_by_id(
-                borrowed_book_id=borrowed_book_id
-            )
-        except RowDoesNotExist as e:
-            raise BorrowedBookDoesNotExist(
-                f"BorrowedBook with id - {borrowed_book_id} does not exist"
-            ) from e
+        """book instances and reader active loans follow return_at,
+        clearing it borrows the book again"""
+        old_borrowed_book = await self._get_one_with_reader_locked(
+            borrowed_book_id=borrowed_book_id
+        )
+        new_fields = borrowed_book_on_update.model_dump(exclude_unset=True)
+        borrow_at = new_fields.get("borrow_at", old_borrowed_book.borrow_at)
+        return_at = new_fields.get("return_at", old_borrowed_book.return_at)
 
         # borrow and return date checking
-        if borrowed_book_on_update.borrow_at >= borrowed_book_on_update.return_at:
+        if return_at is not None and borrow_at >= return_at:
             raise BorrowedBookInvalidReturnDateError(
                 "BorrowedBook borrow_at can`t be less or equal than return_at"
             )
+        if "borrow_at" in new_fields:
+            new_fields["due_at"] = borrow_at + self.loan_period
+        is_reopened = old_borrowed_book.return_at is not None and return_at is None
+        # loan with new due date or reopened one can get overdue again,
+        # overdue job notifies about it once more
+        if "due_at" in new_fields or is_reopened:
+            new_fields["overdue_notified_at"] = None
+
+        book_id, reader_id = old_borrowed_book.book_id, old_borrowed_book.reader_id
+        if is_reopened:
+            is_already_borrowed = (
+                await self.repository.exists_not_returned_by_reader_id_and_book_id(
+                    reader_id=reader_id, book_id=book_id
+                )
+            )
+            if is_already_borrowed:
+                raise BorrowedBookAlreadyBorrowed(
+                    "Reader already have BorrowedBook"
+                )
+            await self.no_more_than_thee_borrowed_books_validator.is_satisfied(
+                reader_id=reader_id
+            )
+            try:
+                await self.book_service.decrease_book_instances(book_id=book_id)
+            except BookDoesNotHaveAnyInstancesError as e:
+                raise BorrowedBookUnableToBorrowBook(
+                    "Unable to borrow book, haven`t got any instances"
+                ) from e
+            await self.reader_service.add_active_loans(
+                reader_id=reader_id, amount=1
+            )
+        elif old_borrowed_book.return_at is None and return_at is not None:
+            await self.book_service.increase_book_instances(book_id=book_id)
+            await self.reader_service.add_active_loans(
+                reader_id=reader_id, amount=-1
+            )
 
-        for field, value in old_borrowed_book.model_dump(exclude_unset=True).items():
+        for field, value in new_fields.items():
             setattr(old_borrowed_book, field, value)
 
-        await self.repository.update_one(borrowed_book_on_update=old_borrowed_book)
+        try:
+            await self.repository.update_one(
+                borrowed_book_on_update=old_borrowed_book
+            )
+        except RowAlreadyExists as e:
+            raise BorrowedBookAlreadyBorrowed(
+                "Reader already have BorrowedBook"
+            ) from e
 
     async def return_one(self, reader_id: int, book_id) -> None:
+        # locks are taken in the same order as by borrows: reader, book,
+        # loan, so concurrent borrow and return can`t deadlock
         try:
-            borrowed_book_on_return_orm = (
-                await self.repository.get_one_by_reader_id_and_book_id(
-                    reader_id=reader_id, book_id=book_id
-                )
-            )
-        except RowDoesNotExist as e:
+            await self.reader_service.lock_one_by_id(reader_id=reader_id)
+        except ReaderDoesNotExist as e:
             raise BorrowedBookDoesNotExist(
                 f"BorrowedBook with reader_id - {reader_id} "
                 f"and book_id - {book_id} does not exist"
             ) from e
-        
-        if borrowed_book_on_return_orm.return_at is not None:
-            raise BorrowedBookAlreadyReturned(
-                "Unable to borrow book, already returned"
+
+        # conditional UPDATE, of concurrent returns only one finds the loan
+        try:
+            await self.repository.return_one(
+                reader_id=reader_id,
+                book_id=book_id,
+                return_at=datetime.now().date(),
             )
+        except RowDoesNotExist as e:
+            try:
+                await self.repository.get_one_by_reader_id_and_book_id(
+                    reader_id=reader_id, book_id=book_id
+                )
+            except RowDoesNotExist:
+                raise BorrowedBookDoesNotExist(
+                    f"BorrowedBook with reader_id - {reader_id} "
+                    f"and book_id - {book_id} does not exist"
+                ) from e
+            raise BorrowedBookAlreadyReturned(
+                "Unable to return book, already returned"
+            ) from e
 
         # increase book instances amount
-        await self.book_service.increase_book_instances(
-            book_id=borrowed_book_on_return_orm.book_id
-        )
+        await self.book_service.increase_book_instances(book_id=book_id)
+        await self.reader_service.add_active_loans(reader_id=reader_id, amount=-1)
 
-        # set retrun_at date
-        borrowed_book_on_return_orm.return_at = datetime.now().date()
+    async def return_many(
+        self, reader_id: int, book_ids: list[int]
+    ) -> list[BorrowedBookBatchItemSchema]:
+        """returns several books of reader at once, books reader hasn`t
+        borrowed are reported in results, raises ReaderDoesNotExist for
+        unknown reader like create_many"""
+        # same lock order as borrows, see return_one
+        await self.reader_service.lock_one_by_id(reader_id=reader_id)
 
-        await self.repository.update_one(
-            borrowed_book_on_update=borrowed_book_on_return_orm
+        returned_borrowed_books = await self.repository.return_many(
+            reader_id=reader_id,
+            book_ids=list(dict.fromkeys(book_ids)),
+            return_at=datetime.now().date(),
         )
-    
+        borrowed_book_ids = {
+            book_id: borrowed_book_id
+            for borrowed_book_id, book_id in returned_borrowed_books
+        }
+        if borrowed_book_ids:
+            await self.book_service.increase_books_instances(
+                book_ids=list(borrowed_book_ids)
+            )
+            await self.reader_service.add_active_loans(
+                reader_id=reader_id, amount=-len(borrowed_book_ids)
+            )
+
+        statuses = {
+            book_id: (
+                BorrowedBookBatchStatus.returned
+                if book_id in borrowed_book_ids
+                else BorrowedBookBatchStatus.not_borrowed
+            )
+            for book_id in book_ids
+        }
+
+        return self._get_batch_results(book_ids, statuses, borrowed_book_ids)
+
+    @staticmethod
+    def _get_batch_results(
+        book_ids: list[int],
+        statuses: dict[int, BorrowedBookBatchStatus],
+        borrowed_book_ids: dict[int, int],
+    ) -> list[BorrowedBookBatchItemSchema]:
+        """results in request order, repeated book ids are reported
+        as duplicates"""
+        results = []
+        seen_book_ids = set()
+        for book_id in book_ids:
+            if book_id in seen_book_ids:
+                results.append(
+                    BorrowedBookBatchItemSchema(
+                        book_id=book_id, status=BorrowedBookBatchStatus.duplicate
+                    )
+                )
+                continue
+            seen_book_ids.add(book_id)
+            results.append(
+                BorrowedBookBatchItemSchema(
+                    book_id=book_id,
+                    borrowed_book_id=borrowed_book_ids.get(book_id),
+                    status=statuses[book_id],
+                )
+            )
+
+        return results
+
     async def delete_one(self, borrowed_book_on_delete_id: int) -> None:
+        borrowed_book_on_delete_orm = await self._get_one_with_reader_locked(
+            borrowed_book_id=borrowed_book_on_delete_id
+        )
+
+        await self.repository.delete_one(
+            borrowed_book_on_delete=borrowed_book_on_delete_orm
+        )
+        # deleted not returned loan gives its instance back
+        if borrowed_book_on_delete_orm.return_at is None:
+            await self.book_service.increase_book_instances(
+                book_id=borrowed_book_on_delete_orm.book_id
+            )
+            await self.reader_service.add_active_loans(
+                reader_id=borrowed_book_on_delete_orm.reader_id, amount=-1
+            )
+
+    async def _get_one_with_reader_locked(
+        self, borrowed_book_id: int
+    ) -> BorrowedBook:
+        """locks loan`s reader the same way borrows and returns do, loan
+        is read again after the lock, so its return_at is up to date"""
         try:
-            borrowed_book_on_delete_orm = await self.repository.get_one_by_id(
-                borrowed_book_id=borrowed_book_on_delete_id
+            borrowed_book = await self.repository.get_one_by_id(
+                borrowed_book_id=borrowed_book_id
             )
-        except RowDoesNotExist as e:
+            await self.reader_service.lock_one_by_id(
+                reader_id=borrowed_book.reader_id
+            )
+            borrowed_book = await self.repository.get_one_by_id(
+                borrowed_book_id=borrowed_book_id
+            )
+        except (RowDoesNotExist, ReaderDoesNotExist) as e:
             raise BorrowedBookDoesNotExist(
-                f"BorrowedBook with id - {borrowed_book_on_delete_id} does not exist"
+                f"BorrowedBook with id - {borrowed_book_id} does not exist"
             ) from e
-        
-        await self.repository.delete_one(
-            borrowed_book_on_delete=borrowed_book_on_delete_orm
-        )
+
+        return borrowed_book
         
 
@@ -0,0 +1,38 @@
+from typing import Any, Awaitable, Callable, Sequence
+
+from schemas.bulk import BulkItemResultSchema, BulkItemStatus
+
+
+UpsertMany = Callable[[list[dict[str, Any]]], Awaitable[Sequence[tuple]]]
+
+
+async def upsert_in_batches(
+        rows: list[dict[str, Any]],
+        key: str,
+        upsert_many: UpsertMany,
+        batch_size: int = 1000
+) -> list[BulkItemResultSchema]:
+    """upserts rows by unique key with one statement per batch,
+    upsert_many must return (id, key, created) for every written row,
+    rows it skipped and repeated keys are reported as conflicts"""
+    results = [
+        BulkItemResultSchema(index=index, status=BulkItemStatus.conflict)
+        for index in range(len(rows))
+    ]
+
+    # one statement can`t upsert the same key twice, first row wins
+    index_by_key: dict[Any, int] = {}
+    for index, row in enumerate(rows):
+        index_by_key.setdefault(row[key], index)
+    unique_indexes = list(index_by_key.values())
+
+    for start in range(0, len(unique_indexes), batch_size):
+        batch = [rows[index]
+                 for index in unique_indexes[start:start + batch_size]]
+        for row_id, row_key, created in await upsert_many(batch):
+            result = results[index_by_key[row_key]]
+            result.id = row_id
+            result.status = (BulkItemStatus.created if created
+                             else BulkItemStatus.updated)
+
+    return results
@@ -0,0 +1,78 @@
+import csv
+import json
+from datetime import date
+from io import StringIO
+from typing import AsyncIterator, Any
+
+from repositories.export import ExportRepository
+from models.book import Book
+from models.reader import Reader
+from models.borrowed_book import BorrowedBook
+from schemas.export import ExportEntity, ExportFormat
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} '
+                    'is not JSON serializable')
+
+
+class ExportService:
+    models = {
+        ExportEntity.books: Book,
+        ExportEntity.readers: Reader,
+        ExportEntity.borrowed_books: BorrowedBook,
+    }
+    media_types = {
+        ExportFormat.ndjson: 'application/x-ndjson',
+        ExportFormat.csv: 'text/csv',
+    }
+
+    def __init__(self, repository: ExportRepository,
+                 chunk_size: int = 1000) -> None:
+        self.repository = repository
+        self.chunk_size = chunk_size
+
+    def get_media_type(self, export_format: ExportFormat) -> str:
+        return self.media_types[export_format]
+
+    def export(
+            self, entity: ExportEntity, export_format: ExportFormat
+    ) -> AsyncIterator[str]:
+        """returns async iterator of encoded chunks, one per db fetch"""
+        if export_format is ExportFormat.csv:
+            return self._export_csv(entity)
+        return self._export_ndjson(entity)
+
+    async def _export_ndjson(self, entity: ExportEntity) -> AsyncIterator[str]:
+        rows_chunks = self.repository.stream_all(
+            model=self.models[entity], chunk_size=self.chunk_size
+        )
+        async for rows in rows_chunks:
+            yield ''.join(
+                json.dumps(dict(row), default=_json_default) + '\n'
+                for row in rows
+            )
+
+    async def _export_csv(self, entity: ExportEntity) -> AsyncIterator[str]:
+        model = self.models[entity]
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(
+            column.name for column in self.repository.get_columns(model)
+        )
+        rows_chunks = self.repository.stream_all(
+            model=model, chunk_size=self.chunk_size
+        )
+        async for rows in rows_chunks:
+            writer.writerows(row.values() for row in rows)
+            yield buffer.getvalue()
+
+            buffer.seek(0)
+            buffer.truncate()
+
+        # header only for empty table
+        if buffer.tell():
+            yield buffer.getvalue()
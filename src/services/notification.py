@@ -0,0 +1,39 @@
+from datetime import date
+
+from repositories.borrowed_book import BorrowedBookRepository
+from repositories.outbox import OutboxRepository
+
+
+LOAN_OVERDUE = 'loan_overdue'
+
+
+class NotificationService:
+    def __init__(
+            self,
+            borrowed_book_repository: BorrowedBookRepository,
+            outbox_repository: OutboxRepository
+    ) -> None:
+        self.borrowed_book_repository = borrowed_book_repository
+        self.outbox_repository = outbox_repository
+
+    async def notify_overdue(self, today: date, limit: int) -> int:
+        """claims up to limit overdue loans and writes notification
+        about every one to outbox, returns amount of claimed loans"""
+        overdue_loans = await self.borrowed_book_repository.claim_overdue(
+            today=today, limit=limit
+        )
+        if overdue_loans:
+            await self.outbox_repository.create_many(new_messages=[
+                {
+                    'kind': LOAN_OVERDUE,
+                    'payload': {
+                        'borrowed_book_id': loan['id'],
+                        'reader_id': loan['reader_id'],
+                        'book_id': loan['book_id'],
+                        'due_at': loan['due_at'].isoformat(),
+                    },
+                }
+                for loan in overdue_loans
+            ])
+
+        return len(overdue_loans)
@@ -1,17 +1,48 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
 from repositories.reader import ReaderRepository
+from core.cache import SchemaCache
+from core.serialization import get_schema_columns
+from core.database import run_after_commit
+from services.bulk import upsert_in_batches
 from models.reader import Reader
-from exceptions.repositories import RowDoesNotExist, RowAlreadyExists
-from exceptions.services import ReaderDoesNotExist, ReaderEmailAlreadyExists
+from exceptions.repositories import (
+    RowDoesNotExist, RowAlreadyExists, RowIsReferenced
+)
+from exceptions.services import (
+    ReaderDoesNotExist,
+    ReaderEmailAlreadyExists,
+    ReaderHasBorrowedBooks
+)
 from schemas.reader import (
     ReaderOutputSchema,
     ReaderCreateSchema,
-    ReaderUpdateSchema
+    ReaderUpdateSchema,
+    ReaderSummarySchema
 )
+from schemas.bulk import BulkItemResultSchema, BulkItemStatus
 
 
 class ReaderService:
-    def __init__(self, repository: ReaderRepository):
+    def __init__(
+            self,
+            repository: ReaderRepository,
+            cache: Optional[SchemaCache[ReaderOutputSchema]] = None
+    ):
         self.repository = repository
+        self.cache = cache
+
+    def _invalidate_cached(self, *reader_ids: int) -> None:
+        """drops readers from cache once request transaction is commited,
+
+        read which loaded the row before commit can still store it after
+        invalidation, such stale entry lives until CACHE_TTL expires
+        """
+        if self.cache is not None and reader_ids:
+            run_after_commit(self.repository.session,
+                             lambda: self.cache.invalidate(*reader_ids))
 
     async def get_all(self) -> list[ReaderOutputSchema]: 
         readers_orm = await self.repository.get_all()
@@ -20,7 +51,31 @@ class ReaderService:
         
         return readers
     
+    async def get_all_rows(
+            self, schema: type[BaseModel] = ReaderOutputSchema
+    ) -> list[dict[str, Any]]:
+        """all readers, only schema columns as plain dicts"""
+        readers = await self.repository.get_all_rows(
+            columns=get_schema_columns(schema)
+        )
+
+        return [dict(reader) for reader in readers]
+
+    async def get_all_summary(self) -> list[ReaderSummarySchema]:
+        """all readers, only columns of summary view are selected"""
+        readers = await self.repository.get_all_rows(
+            columns=get_schema_columns(ReaderSummarySchema)
+        )
+
+        return [ReaderSummarySchema.model_validate(reader)
+                for reader in readers]
+
     async def get_one_by_id(self, reader_id: int) -> ReaderOutputSchema:
+        if self.cache is not None:
+            cached_reader = await self.cache.get(reader_id)
+            if cached_reader is not None:
+                return cached_reader
+
         try:
             reader_orm = await self.repository.get_one_by_id(reader_id=reader_id)
             reader = ReaderOutputSchema.model_validate(reader_orm)
@@ -29,9 +84,29 @@ class ReaderService:
                 f'Reader with id - {reader_id}'
                 'does not exist'
             ) from e
+
+        if self.cache is not None:
+            await self.cache.set(reader_id, reader)
         
         return reader
     
+    async def lock_one_by_id(self, reader_id: int) -> None:
+        """locks reader till request transaction ends"""
+        try:
+            await self.repository.lock_one_by_id(reader_id=reader_id)
+        except RowDoesNotExist as e:
+            raise ReaderDoesNotExist(
+                f'Reader with id - {reader_id}'
+                'does not exist'
+            ) from e
+
+    async def add_active_loans(self, reader_id: int, amount: int) -> None:
+        """keeps reader`s not returned loans counter, amount is negative
+        for returns"""
+        await self.repository.add_active_loans(
+            reader_id=reader_id, amount=amount
+        )
+
     async def create_one(self, new_reader: ReaderCreateSchema) -> int:
         try:
             new_reader_orm = Reader(**new_reader.model_dump())
@@ -44,6 +119,25 @@ class ReaderService:
         
         return new_reader_id
     
+    async def bulk_upsert(
+            self,
+            readers: list[ReaderCreateSchema],
+            update_existing: bool = True
+    ) -> list[BulkItemResultSchema]:
+        """creates readers in batches, readers with already existing email
+        are updated or, if update_existing is False, reported as conflicts"""
+        results = await upsert_in_batches(
+            rows=[reader.model_dump() for reader in readers],
+            key='email',
+            upsert_many=lambda rows: self.repository.upsert_many(
+                rows=rows, update_existing=update_existing
+            )
+        )
+        self._invalidate_cached(*(result.id for result in results
+                                  if result.status is BulkItemStatus.updated))
+
+        return results
+    
     async def update_one(self, reader_id: int, reader_on_update: ReaderUpdateSchema) -> None:
         try:
             old_reader_orm = await self.repository.get_one_by_id(reader_id=reader_id)
@@ -63,9 +157,12 @@ class ReaderService:
                 f'Reader with email - {reader_on_update.email}' 
                 'already exists'
             ) from e
+        self._invalidate_cached(reader_id)
 
     async def delete_one(self, reader_id: int) -> None:
         try:
+            # same lock as borrows and returns take
+            await self.repository.lock_one_by_id(reader_id=reader_id)
             reader_on_delete_orm = await self.repository.get_one_by_id(
                                                              reader_id=reader_id)
         except RowDoesNotExist as e:
@@ -74,4 +171,19 @@ class ReaderService:
                 'does not exist'
             ) from e
 
-        await self.repository.delete_one(reader_on_delete=reader_on_delete_orm)
+        if reader_on_delete_orm.active_loans > 0:
+            raise ReaderHasBorrowedBooks(
+                f'Reader with id - {reader_id} has '
+                f'{reader_on_delete_orm.active_loans} not returned books'
+            )
+
+        try:
+            await self.repository.delete_one(
+                reader_on_delete=reader_on_delete_orm
+            )
+        except RowIsReferenced as e:
+            raise ReaderHasBorrowedBooks(
+                f'Reader with id - {reader_id} has returned books, '
+                'their loans history is kept'
+            ) from e
+        self._invalidate_cached(reader_id)
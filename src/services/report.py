@@ -0,0 +1,51 @@
+from datetime import date
+
+from repositories.borrowed_book import BorrowedBookRepository
+from exceptions.services import InvalidReportDateRange
+from schemas.report import (
+    CirculationGroupBy,
+    CirculationRowSchema,
+    CirculationReportSchema
+)
+
+
+class ReportService:
+    def __init__(self, repository: BorrowedBookRepository) -> None:
+        self.repository = repository
+
+    async def get_circulation(
+            self,
+            date_from: date,
+            date_to: date,
+            group_by: CirculationGroupBy,
+            limit: int,
+            offset: int = 0
+    ) -> CirculationReportSchema:
+        """loans, returns, average loan duration and overdue loans
+        per borrow month, one page"""
+        if date_from > date_to:
+            raise InvalidReportDateRange(
+                'date_from can`t be later than date_to'
+            )
+
+        group_by_column = {
+            CirculationGroupBy.month: None,
+            CirculationGroupBy.book: 'book_id',
+            CirculationGroupBy.reader: 'reader_id',
+        }[group_by]
+        # one extra row tells whether the next page exists
+        rows = await self.repository.get_circulation(
+            date_from=date_from,
+            date_to=date_to,
+            today=date.today(),
+            group_by=group_by_column,
+            limit=limit + 1,
+            offset=offset
+        )
+        next_offset = offset + limit if len(rows) > limit else None
+
+        return CirculationReportSchema(
+            items=[CirculationRowSchema.model_validate(dict(row))
+                   for row in rows[:limit]],
+            next_offset=next_offset
+        )
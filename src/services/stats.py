@@ -0,0 +1,60 @@
+from typing import Optional
+
+from repositories.stats import StatsRepository
+from core.pagination import encode_cursor, decode_cursor
+from schemas.stats import (
+    BookAvailabilitySchema,
+    BookAvailabilityPageSchema,
+    ReaderActiveLoansSchema,
+    ReaderActiveLoansPageSchema,
+    StatsReconcileSchema
+)
+
+
+class StatsService:
+    def __init__(self, repository: StatsRepository) -> None:
+        self.repository = repository
+
+    async def get_books_availability(
+            self, limit: int, after: Optional[str] = None
+    ) -> BookAvailabilityPageSchema:
+        """instances on shelf and on loan per book, one page"""
+        after_id = decode_cursor(after) if after is not None else None
+        # one extra row tells whether the next page exists
+        books = await self.repository.get_books_availability(
+            limit=limit + 1, after_id=after_id
+        )
+        next_cursor = (encode_cursor(books[limit - 1]['book_id'])
+                       if len(books) > limit else None)
+
+        return BookAvailabilityPageSchema(
+            items=[BookAvailabilitySchema.model_validate(book)
+                   for book in books[:limit]],
+            next_cursor=next_cursor
+        )
+
+    async def get_readers_active_loans(
+            self, limit: int, after: Optional[str] = None
+    ) -> ReaderActiveLoansPageSchema:
+        """not returned loans per reader, one page"""
+        after_id = decode_cursor(after) if after is not None else None
+        readers = await self.repository.get_readers_active_loans(
+            limit=limit + 1, after_id=after_id
+        )
+        next_cursor = (encode_cursor(readers[limit - 1]['reader_id'])
+                       if len(readers) > limit else None)
+
+        return ReaderActiveLoansPageSchema(
+            items=[ReaderActiveLoansSchema.model_validate(reader)
+                   for reader in readers[:limit]],
+            next_cursor=next_cursor
+        )
+
+    async def reconcile(self) -> StatsReconcileSchema:
+        """recounts loans counters from loans table, they are kept
+        incrementally by borrow and return, so this only fixes drift,
+        e.g. after loans were edited by hand"""
+        return StatsReconcileSchema(
+            books=await self.repository.reconcile_books(),
+            readers=await self.repository.reconcile_readers()
+        )